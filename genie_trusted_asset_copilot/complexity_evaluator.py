@@ -5,20 +5,40 @@ This module analyzes SQL queries to determine their complexity
 and extracts parameterizable values using an LLM for structured analysis.
 """
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
+import json
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from itertools import islice
+
+import xxhash
 from databricks_langchain import ChatDatabricks
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import HumanMessage
 from loguru import logger
-
+from sqlglot import exp
+
+from genie_trusted_asset_copilot.llm import (
+    AdaptiveConcurrencyLimiter,
+    TokenUsageTracker,
+    cached_system_message,
+    get_llm,
+    get_structured_llm,
+    invoke_with_retry,
+)
+from genie_trusted_asset_copilot.llm_cache import LLMCache
 from genie_trusted_asset_copilot.models import (
+    BatchCombinedAnalysis,
+    CombinedAnalysis,
     ComplexityAnalysis,
+    ComplexityClassification,
     ExtractedQuery,
     ParameterExtraction,
     SQLComplexity,
     SQLParameter,
     TrustedAssetCandidate,
 )
+from genie_trusted_asset_copilot.sql_analysis import fingerprint_sql, parse_sql, summarize_sql
 
 COMPLEXITY_SYSTEM_PROMPT = """You are an expert SQL analyst. Your task is to analyze SQL queries and determine their complexity.
 
@@ -78,6 +98,88 @@ Parameters:
 - customer_name (String): Customer name to filter by, default 'ACME Corp'
 - min_amount (Integer): Minimum order amount threshold, default 1000"""
 
+COMBINED_ANALYSIS_PROMPT = """You are an expert SQL analyst. Your task is to analyze a SQL query in two steps:
+first classify its complexity, then (only if it meets the requested threshold) identify
+literal values that should be parameterized for reusability.
+
+## Step 1: Complexity classification
+
+Classify the query into one of three complexity levels:
+- SIMPLE: Basic SELECT with simple WHERE clauses, no JOINs or subqueries
+- MODERATE: Contains JOINs, GROUP BY, or simple aggregations
+- COMPLEX: Contains multiple JOINs, subqueries, CTEs, window functions, or complex aggregations
+
+When analyzing, identify:
+1. Number of JOIN operations
+2. Presence of subqueries (in SELECT, FROM, or WHERE clauses)
+3. Use of CTEs (WITH clauses)
+4. Window functions (OVER, PARTITION BY, ROW_NUMBER, RANK, etc.)
+5. Complex aggregations (GROUP BY with HAVING, multiple aggregate functions)
+6. Set operations (UNION, INTERSECT, EXCEPT)
+
+A query should be classified as COMPLEX if it has:
+- 3 or more JOINs, OR
+- Any CTEs with multiple references, OR
+- Window functions, OR
+- Nested subqueries, OR
+- Complex business logic that would benefit from being a reusable trusted asset
+
+Provide clear reasoning for your classification.
+
+## Step 2: Parameter extraction
+
+If the complexity from Step 1 is BELOW the parameter extraction threshold given in the
+request, stop here: return an empty parameters list and a null parameterized_sql.
+
+Otherwise, identify values that are likely to change between executions:
+1. **Dates and time periods**: Specific dates, date ranges, week numbers, months, years
+2. **Entity identifiers**: Customer IDs, airline names, site names, region names, product codes
+3. **Thresholds and limits**: Numeric thresholds, LIMIT values, TOP N values
+4. **Status values**: Status codes, categories that might be filtered differently
+
+DO NOT parameterize:
+- Table names or column names
+- SQL keywords or operators
+- Aggregate functions
+- Constant business logic values that are unlikely to change
+
+For each parameter:
+1. Create a descriptive snake_case name (e.g., start_date, airline_name, min_threshold)
+2. Determine the Genie parameter type (MUST be one of): String, Date, Date and Time, Decimal, or Integer
+3. Use the original value as the default value
+4. Write a clear description of what the parameter represents
+
+In the parameterized SQL:
+- Replace literal values with named parameter markers using colon prefix: :parameter_name
+- Maintain proper SQL syntax
+- Keep the query structure intact
+
+Example:
+Original: SELECT * FROM orders WHERE order_date >= '2024-01-01' AND customer = 'ACME Corp' AND amount > 1000
+Parameterized: SELECT * FROM orders WHERE order_date >= :start_date AND customer = :customer_name AND amount > :min_amount
+
+Parameters:
+- start_date (Date): The minimum order date filter, default '2024-01-01'
+- customer_name (String): Customer name to filter by, default 'ACME Corp'
+- min_amount (Integer): Minimum order amount threshold, default 1000"""
+
+# Upper bound on queries per LLM request; accuracy degrades on very large batches
+MAX_BATCH_SIZE = 16
+
+# Keywords checked by the keyword analysis (matched against upper-cased SQL)
+WINDOW_KEYWORDS = ("OVER(", "OVER (", "PARTITION BY", "ROW_NUMBER", "RANK(", "DENSE_RANK", "LAG(", "LEAD(")
+AGGREGATION_KEYWORDS = ("GROUP BY", "SUM(", "COUNT(", "AVG(", "MAX(", "MIN(")
+
+# Digest of the prompts and response schemas, part of every cache key so that
+# changing either invalidates results cached by earlier versions
+PROMPT_VERSION = LLMCache.make_key(
+    COMPLEXITY_SYSTEM_PROMPT,
+    PARAMETER_EXTRACTION_PROMPT,
+    COMBINED_ANALYSIS_PROMPT,
+    json.dumps(ComplexityClassification.model_json_schema(), sort_keys=True),
+    json.dumps(ParameterExtraction.model_json_schema(), sort_keys=True),
+)
+
 
 class ComplexityEvaluator:
     """Evaluates SQL query complexity using ChatDatabricks."""
@@ -87,6 +189,10 @@ class ComplexityEvaluator:
         model: str = "databricks-claude-sonnet-4",
         temperature: float = 0.0,
         max_tokens: int = 1000,
+        batch_size: int = 8,
+        cache: LLMCache | None = None,
+        max_concurrency: int | None = None,
+        prefilter: bool = True,
     ) -> None:
         """
         Initialize the complexity evaluator.
@@ -94,43 +200,191 @@ class ComplexityEvaluator:
         Args:
             model: The Databricks model to use for analysis.
             temperature: LLM temperature (0 for deterministic output).
-            max_tokens: Maximum tokens in the response.
+            max_tokens: Maximum tokens in the response (per query when batching).
+            batch_size: Number of queries sent per LLM request (capped at MAX_BATCH_SIZE).
+            cache: Optional cache for LLM results, reused across runs.
+            max_concurrency: Optional cap on concurrent LLM requests, for model serving
+                endpoints with QPS limits (None to allow one per worker).
+            prefilter: Skip the LLM for queries that local analysis already places
+                below the complexity threshold.
         """
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.cache = cache
+        self.max_concurrency = max(1, max_concurrency) if max_concurrency else None
+        self.prefilter = prefilter
+
+        # Throttles concurrent LLM calls; resized for each evaluation run
+        self._limiter = AdaptiveConcurrencyLimiter(max_concurrency=4)
+
+        # Queries resolved without an LLM request during the current run
+        self._run_counts: dict[str, int] = {"prefiltered": 0, "cached": 0}
+
+        # Aggregated token usage across all LLM calls made by this evaluator
+        self.token_usage = TokenUsageTracker()
 
         self._llm: ChatDatabricks | None = None
         self._structured_llm: ChatDatabricks | None = None
         self._param_extraction_llm: ChatDatabricks | None = None
+        self._combined_llm: ChatDatabricks | None = None
+        self._batch_llm: ChatDatabricks | None = None
 
     @property
     def llm(self) -> ChatDatabricks:
-        """Lazy initialization of the LLM client."""
+        """Lazy initialization of the (shared) LLM client."""
         if self._llm is None:
-            self._llm = ChatDatabricks(
-                model=self.model,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-            )
+            self._llm = get_llm(self.model, self.temperature, self.max_tokens)
         return self._llm
 
     @property
     def structured_llm(self) -> ChatDatabricks:
-        """LLM configured for structured output for complexity analysis."""
+        """LLM configured for structured output for complexity classification."""
         if self._structured_llm is None:
-            self._structured_llm = self.llm.with_structured_output(ComplexityAnalysis)
+            self._structured_llm = get_structured_llm(
+                self.model, self.temperature, self.max_tokens, ComplexityClassification
+            )
         return self._structured_llm
 
     @property
     def param_extraction_llm(self) -> ChatDatabricks:
         """LLM configured for structured output for parameter extraction."""
         if self._param_extraction_llm is None:
-            self._param_extraction_llm = self.llm.with_structured_output(
-                ParameterExtraction
+            self._param_extraction_llm = get_structured_llm(
+                self.model, self.temperature, self.max_tokens, ParameterExtraction
             )
         return self._param_extraction_llm
 
+    @property
+    def combined_llm(self) -> ChatDatabricks:
+        """LLM configured for structured output for combined analysis and extraction."""
+        if self._combined_llm is None:
+            self._combined_llm = get_structured_llm(
+                self.model, self.temperature, self.max_tokens, CombinedAnalysis
+            )
+        return self._combined_llm
+
+    @property
+    def batch_llm(self) -> ChatDatabricks:
+        """LLM configured for structured output for batched combined analysis."""
+        if self._batch_llm is None:
+            # Each query in the batch needs its own share of the output budget
+            self._batch_llm = get_structured_llm(
+                self.model,
+                self.temperature,
+                self.max_tokens * self.batch_size,
+                BatchCombinedAnalysis,
+            )
+        return self._batch_llm
+
+    def _complexity_cache_key(self, sql: str) -> str:
+        """
+        Build the cache key for a complexity analysis.
+
+        Complexity depends on query structure, not literal values, so the
+        key uses the SQL fingerprint and queries that differ only in filter
+        values share an entry.
+
+        Args:
+            sql: The SQL query.
+
+        Returns:
+            The cache key.
+        """
+        return LLMCache.make_key(self.model, PROMPT_VERSION, "complexity", fingerprint_sql(sql))
+
+    def _get_cached_complexity(self, sql: str) -> ComplexityAnalysis | None:
+        """
+        Look up a cached complexity analysis for a SQL query.
+
+        Args:
+            sql: The SQL query.
+
+        Returns:
+            The cached ComplexityAnalysis, or None on a miss.
+        """
+        if self.cache is None:
+            return None
+        cached = self.cache.get(self._complexity_cache_key(sql))
+        return ComplexityAnalysis(**cached) if cached is not None else None
+
+    def _set_cached_complexity(self, sql: str, analysis: ComplexityAnalysis) -> None:
+        """
+        Store a complexity analysis returned by the LLM.
+
+        Args:
+            sql: The SQL query.
+            analysis: The complexity analysis to cache.
+        """
+        if self.cache is None:
+            return
+        self.cache.set(self._complexity_cache_key(sql), analysis.model_dump(mode="json"))
+
+    def _parameters_cache_key(self, sql: str, question: str) -> str:
+        """
+        Build the cache key for a parameter extraction.
+
+        Args:
+            sql: The SQL query.
+            question: The original question, which shapes the extraction.
+
+        Returns:
+            The cache key.
+        """
+        return LLMCache.make_key(self.model, PROMPT_VERSION, "params", question, sql.strip())
+
+    def _get_cached_parameters(
+        self,
+        sql: str,
+        question: str,
+    ) -> tuple[list[SQLParameter], str | None] | None:
+        """
+        Look up cached parameter extraction results for a SQL query.
+
+        Args:
+            sql: The SQL query.
+            question: The original question, which shapes the extraction.
+
+        Returns:
+            Tuple of (parameters, parameterized SQL or None), or None on a miss.
+        """
+        if self.cache is None:
+            return None
+        cached = self.cache.get(self._parameters_cache_key(sql, question))
+        if cached is None:
+            return None
+        parameters = [SQLParameter(**p) for p in cached.get("parameters", [])]
+        return parameters, cached.get("parameterized_sql")
+
+    def _set_cached_parameters(
+        self,
+        sql: str,
+        question: str,
+        parameters: list[SQLParameter],
+        parameterized_sql: str | None,
+    ) -> None:
+        """
+        Store parameter extraction results returned by the LLM.
+
+        Args:
+            sql: The SQL query.
+            question: The original question.
+            parameters: The extracted parameters.
+            parameterized_sql: The parameterized SQL, if any.
+        """
+        if self.cache is None:
+            return
+        # Stored as a plain dict: queries without parameters have no
+        # parameterized SQL, which ParameterExtraction does not allow
+        self.cache.set(
+            self._parameters_cache_key(sql, question),
+            {
+                "parameters": [p.model_dump(mode="json") for p in parameters],
+                "parameterized_sql": parameterized_sql,
+            },
+        )
+
     def extract_parameters(
         self,
         sql: str,
@@ -146,8 +400,12 @@ class ComplexityEvaluator:
         Returns:
             Tuple of (list of extracted parameters, parameterized SQL or None).
         """
+        cached = self._get_cached_parameters(sql, question)
+        if cached is not None:
+            return cached
+
         messages = [
-            SystemMessage(content=PARAMETER_EXTRACTION_PROMPT),
+            cached_system_message(PARAMETER_EXTRACTION_PROMPT, self.model),
             HumanMessage(
                 content=f"Extract parameters from this SQL query.\n\n"
                 f"Original question: {question}\n\n"
@@ -156,7 +414,7 @@ class ComplexityEvaluator:
         ]
 
         try:
-            result = self.param_extraction_llm.invoke(messages)
+            result = invoke_with_retry(self.param_extraction_llm, messages, self._limiter, [self.token_usage])
 
             if isinstance(result, ParameterExtraction):
                 if result.parameters:
@@ -164,13 +422,20 @@ class ComplexityEvaluator:
                         f"Extracted {len(result.parameters)} parameters: "
                         f"{', '.join(p.name for p in result.parameters)}"
                     )
+                    self._set_cached_parameters(
+                        sql, question, result.parameters, result.parameterized_sql
+                    )
                     return result.parameters, result.parameterized_sql
                 else:
                     logger.debug("No parameterizable values found in query")
+                    self._set_cached_parameters(sql, question, [], None)
                     return [], None
 
             if isinstance(result, dict):
                 extraction = ParameterExtraction(**result)
+                self._set_cached_parameters(
+                    sql, question, extraction.parameters, extraction.parameterized_sql
+                )
                 return extraction.parameters, extraction.parameterized_sql
 
             logger.warning("Unexpected result type from parameter extraction LLM")
@@ -190,21 +455,28 @@ class ComplexityEvaluator:
         Returns:
             ComplexityAnalysis with the complexity classification and details.
         """
+        cached = self._get_cached_complexity(sql)
+        if cached is not None:
+            return cached
+
         messages = [
-            SystemMessage(content=COMPLEXITY_SYSTEM_PROMPT),
-            HumanMessage(content=f"Analyze this SQL query:\n\n```sql\n{sql}\n```"),
+            cached_system_message(COMPLEXITY_SYSTEM_PROMPT, self.model),
+            # Complexity only depends on structure, so long value lists can be elided
+            HumanMessage(content=f"Analyze this SQL query:\n\n```sql\n{summarize_sql(sql)}\n```"),
         ]
 
         try:
-            result = self.structured_llm.invoke(messages)
-
-            # The structured output should return a ComplexityAnalysis
-            if isinstance(result, ComplexityAnalysis):
-                return result
+            result = invoke_with_retry(self.structured_llm, messages, self._limiter, [self.token_usage])
 
             # Handle case where result is a dict (shouldn't happen with structured output)
             if isinstance(result, dict):
-                return ComplexityAnalysis(**result)
+                result = ComplexityClassification(**result)
+
+            # The structured output should return a ComplexityClassification
+            if isinstance(result, ComplexityClassification):
+                analysis = self._with_structural_features(sql, result)
+                self._set_cached_complexity(sql, analysis)
+                return analysis
 
             # Fallback to simple classification
             logger.warning("Unexpected result type from LLM, falling back to simple analysis")
@@ -214,9 +486,195 @@ class ComplexityEvaluator:
             logger.warning(f"LLM analysis failed, using fallback: {e}")
             return self._fallback_analysis(sql)
 
+    def analyze_and_extract(
+        self,
+        sql: str,
+        question: str,
+        complexity_threshold: SQLComplexity,
+    ) -> CombinedAnalysis | None:
+        """
+        Classify a query and extract its parameters with a single LLM call.
+
+        Parameters are only requested when the query meets the complexity
+        threshold, so queries below it cost no extra output tokens.
+
+        Args:
+            sql: The SQL query to analyze.
+            question: The original question for context.
+            complexity_threshold: Minimum complexity for parameter extraction.
+
+        Returns:
+            CombinedAnalysis, or None if the LLM call failed.
+        """
+        messages = [
+            cached_system_message(COMBINED_ANALYSIS_PROMPT, self.model),
+            HumanMessage(
+                content=f"Parameter extraction threshold: {complexity_threshold.value.upper()}\n\n"
+                f"Original question: {question}\n\n"
+                f"SQL:\n```sql\n{sql}\n```"
+            ),
+        ]
+
+        try:
+            result = invoke_with_retry(self.combined_llm, messages, self._limiter, [self.token_usage])
+
+            if isinstance(result, CombinedAnalysis):
+                return result
+
+            if isinstance(result, dict):
+                return CombinedAnalysis(**result)
+
+            logger.warning("Unexpected result type from combined analysis LLM")
+            return None
+
+        except Exception as e:
+            logger.warning(f"Combined analysis failed, using separate calls: {e}")
+            return None
+
+    def analyze_and_extract_batch(
+        self,
+        queries: list[ExtractedQuery],
+        complexity_threshold: SQLComplexity,
+    ) -> list[CombinedAnalysis] | None:
+        """
+        Classify and extract parameters for several queries with a single LLM call.
+
+        Sending a batch amortizes the fixed system prompt across all queries
+        in the request.
+
+        Args:
+            queries: The queries to analyze (at most MAX_BATCH_SIZE).
+            complexity_threshold: Minimum complexity for parameter extraction.
+
+        Returns:
+            One CombinedAnalysis per query in input order, or None if the call
+            failed or returned a different number of results.
+        """
+        query_blocks = "\n\n".join(
+            f"Query {i}:\n"
+            f"Original question: {query.question}\n"
+            f"SQL:\n```sql\n{query.sql}\n```"
+            for i, query in enumerate(queries, start=1)
+        )
+        messages = [
+            cached_system_message(COMBINED_ANALYSIS_PROMPT, self.model),
+            HumanMessage(
+                content=f"Parameter extraction threshold: {complexity_threshold.value.upper()}\n\n"
+                f"Analyze each of the following {len(queries)} queries independently. "
+                f"Return exactly {len(queries)} results, in the same order as the queries.\n\n"
+                f"{query_blocks}"
+            ),
+        ]
+
+        try:
+            result = invoke_with_retry(self.batch_llm, messages, self._limiter, [self.token_usage])
+
+            if isinstance(result, dict):
+                result = BatchCombinedAnalysis(**result)
+
+            if not isinstance(result, BatchCombinedAnalysis):
+                logger.warning("Unexpected result type from batch analysis LLM")
+                return None
+
+            if len(result.results) != len(queries):
+                logger.warning(
+                    f"Batch analysis returned {len(result.results)} results "
+                    f"for {len(queries)} queries, analyzing individually"
+                )
+                return None
+
+            return result.results
+
+        except Exception as e:
+            logger.warning(f"Batch analysis failed, analyzing individually: {e}")
+            return None
+
+    def _with_structural_features(
+        self,
+        sql: str,
+        classification: ComplexityClassification,
+    ) -> ComplexityAnalysis:
+        """
+        Combine the LLM's classification with features read from the SQL.
+
+        The LLM only decides complexity and reasoning. JOINs, subqueries,
+        CTEs, window functions and aggregations are read from the parsed
+        query, which is deterministic and costs no output tokens.
+
+        Args:
+            sql: The SQL query that was classified.
+            classification: The LLM's complexity classification.
+
+        Returns:
+            ComplexityAnalysis with the LLM's complexity and reasoning.
+        """
+        return self._fallback_analysis(sql).model_copy(
+            update={
+                "complexity": classification.complexity,
+                "reasoning": classification.reasoning,
+            }
+        )
+
     def _fallback_analysis(self, sql: str) -> ComplexityAnalysis:
         """
-        Perform simple regex-based complexity analysis as fallback.
+        Perform local complexity analysis without the LLM.
+
+        Reads structural features from the parsed SQL, falling back to
+        keyword detection if the SQL cannot be parsed.
+
+        Args:
+            sql: The SQL query to analyze.
+
+        Returns:
+            ComplexityAnalysis based on the query structure.
+        """
+        # Only reads the tree, so share the parse with fingerprint_sql and summarize_sql
+        tree = parse_sql(sql, copy=False)
+        if tree is None:
+            return self._keyword_analysis(sql)
+
+        join_count = sum(1 for _ in tree.find_all(exp.Join))
+        has_joins = join_count > 0
+
+        # Any query nested inside another, other than CTE bodies and set operation branches
+        has_subqueries = any(
+            not isinstance(query.parent, (exp.CTE, exp.SetOperation))
+            for query in tree.find_all(exp.Query)
+            if query is not tree
+        )
+        has_set_operations = any(True for _ in tree.find_all(exp.SetOperation))
+        has_ctes = any(True for _ in tree.find_all(exp.CTE))
+        has_window_functions = any(True for _ in tree.find_all(exp.Window))
+        has_aggregations = any(True for _ in tree.find_all(exp.Group, exp.AggFunc))
+
+        # Determine complexity
+        if has_window_functions or has_ctes or join_count >= 3 or has_subqueries or has_set_operations:
+            complexity = SQLComplexity.COMPLEX
+            reasoning = (
+                "Query contains advanced SQL features (window functions, CTEs, multiple JOINs, "
+                "subqueries, or set operations)"
+            )
+        elif has_joins or has_aggregations:
+            complexity = SQLComplexity.MODERATE
+            reasoning = "Query contains JOINs or aggregations"
+        else:
+            complexity = SQLComplexity.SIMPLE
+            reasoning = "Simple query with basic SELECT/WHERE operations"
+
+        return ComplexityAnalysis(
+            complexity=complexity,
+            reasoning=reasoning,
+            has_joins=has_joins,
+            has_subqueries=has_subqueries,
+            has_ctes=has_ctes,
+            has_window_functions=has_window_functions,
+            has_aggregations=has_aggregations,
+            join_count=join_count,
+        )
+
+    def _keyword_analysis(self, sql: str) -> ComplexityAnalysis:
+        """
+        Perform simple keyword-based complexity analysis for unparseable SQL.
 
         Args:
             sql: The SQL query to analyze.
@@ -230,19 +688,18 @@ class ComplexityEvaluator:
         join_count = sql_upper.count(" JOIN ")
         has_joins = join_count > 0
 
-        # Check for subqueries
-        has_subqueries = "SELECT" in sql_upper[sql_upper.find("FROM") :] if "FROM" in sql_upper else False
+        # Check for subqueries (a SELECT after the first FROM), without copying the tail
+        from_index = sql_upper.find("FROM")
+        has_subqueries = from_index != -1 and sql_upper.find("SELECT", from_index) != -1
 
         # Check for CTEs
         has_ctes = sql_upper.strip().startswith("WITH ")
 
         # Check for window functions
-        window_keywords = ["OVER(", "OVER (", "PARTITION BY", "ROW_NUMBER", "RANK(", "DENSE_RANK", "LAG(", "LEAD("]
-        has_window_functions = any(kw in sql_upper for kw in window_keywords)
+        has_window_functions = any(kw in sql_upper for kw in WINDOW_KEYWORDS)
 
         # Check for aggregations
-        agg_keywords = ["GROUP BY", "SUM(", "COUNT(", "AVG(", "MAX(", "MIN("]
-        has_aggregations = any(kw in sql_upper for kw in agg_keywords)
+        has_aggregations = any(kw in sql_upper for kw in AGGREGATION_KEYWORDS)
 
         # Determine complexity
         if has_window_functions or has_ctes or join_count >= 3 or has_subqueries:
@@ -320,8 +777,8 @@ class ComplexityEvaluator:
         query: ExtractedQuery,
         index: int,
         total: int,
-        threshold_value: int,
-        complexity_order: dict[SQLComplexity, int],
+        complexity_threshold: SQLComplexity,
+        combined: CombinedAnalysis | None = None,
     ) -> tuple[int, TrustedAssetCandidate | None]:
         """
         Process a single query (thread-safe worker function).
@@ -330,39 +787,558 @@ class ComplexityEvaluator:
             query: The query to evaluate.
             index: The index of this query in the list.
             total: Total number of queries being evaluated.
-            threshold_value: Numeric complexity threshold value.
-            complexity_order: Mapping of complexity levels to numeric values.
+            complexity_threshold: Minimum complexity to be considered a candidate.
+            combined: Analysis already obtained from a batch request, if any.
 
         Returns:
             Tuple of (index, candidate_or_none) to maintain order.
         """
         logger.info(f"Analyzing query {index + 1}/{total}: {query.question[:60]}...")
 
-        analysis = self.analyze_query(query.sql)
+        if combined is None:
+            combined = self.analyze_and_extract(
+                query.sql, query.question, complexity_threshold
+            )
+        if combined is not None:
+            analysis = self._with_structural_features(query.sql, combined.complexity)
+            self._set_cached_complexity(query.sql, analysis)
+        else:
+            analysis = self.analyze_query(query.sql)
 
         # Log the SQL, complexity, and reasoning for every query
         self._log_analysis_result(query, analysis)
 
-        if complexity_order[analysis.complexity] >= threshold_value:
-            # Extract parameters for complex queries
-            logger.info("Extracting parameters for complex query...")
-            parameters, parameterized_sql = self.extract_parameters(
-                query.sql, query.question
+        if analysis.complexity >= complexity_threshold:
+            if combined is not None:
+                # Parameters came back with the complexity analysis
+                parameters = combined.parameters
+                parameterized_sql = combined.parameterized_sql if parameters else None
+                if parameters:
+                    logger.info(
+                        f"Extracted {len(parameters)} parameters: "
+                        f"{', '.join(p.name for p in parameters)}"
+                    )
+                self._set_cached_parameters(
+                    query.sql, query.question, parameters, parameterized_sql
+                )
+            else:
+                # Extract parameters for complex queries
+                logger.info("Extracting parameters for complex query...")
+                parameters, parameterized_sql = self.extract_parameters(
+                    query.sql, query.question
+                )
+
+            return (index, self._build_candidate(query, analysis, parameters, parameterized_sql))
+
+        return (index, None)
+
+    def _sql_key(self, sql: str) -> int:
+        """
+        Compute a compact deduplication key for a SQL statement.
+
+        Long SQL bodies are reduced to a fixed-size digest once, so repeated
+        lookups hash and compare an int rather than the full statement.
+
+        Args:
+            sql: The SQL statement.
+
+        Returns:
+            128-bit hash of the stripped SQL.
+        """
+        return xxhash.xxh3_128_intdigest(sql.strip())
+
+    def _build_candidate(
+        self,
+        query: ExtractedQuery,
+        analysis: ComplexityAnalysis,
+        parameters: list[SQLParameter],
+        parameterized_sql: str | None,
+    ) -> TrustedAssetCandidate:
+        """
+        Build a trusted asset candidate from an analyzed query.
+
+        Args:
+            query: The analyzed query.
+            analysis: Its complexity analysis.
+            parameters: Extracted parameters.
+            parameterized_sql: Parameterized SQL, if any.
+
+        Returns:
+            The TrustedAssetCandidate.
+        """
+        return TrustedAssetCandidate(
+            question=query.question,
+            sql=query.sql,
+            complexity=analysis,
+            execution_time_ms=query.execution_time_ms,
+            message_id=query.message_id,
+            conversation_id=query.conversation_id,
+            parameters=parameters,
+            parameterized_sql=parameterized_sql,
+        )
+
+    def _evaluate_from_cache(
+        self,
+        query: ExtractedQuery,
+        index: int,
+        complexity_threshold: SQLComplexity,
+    ) -> tuple[int, TrustedAssetCandidate | None] | None:
+        """
+        Resolve a query from cached LLM results without calling the LLM.
+
+        Args:
+            query: The query to evaluate.
+            index: The index of this query in the list.
+            complexity_threshold: Minimum complexity to be considered a candidate.
+
+        Returns:
+            Tuple of (index, candidate_or_none), or None if the cache cannot
+            fully answer for this query.
+        """
+        analysis = self._get_cached_complexity(query.sql)
+        if analysis is None:
+            return None
+
+        if analysis.complexity < complexity_threshold:
+            self._log_analysis_result(query, analysis)
+            return (index, None)
+
+        cached_parameters = self._get_cached_parameters(query.sql, query.question)
+        if cached_parameters is None:
+            return None
+
+        self._log_analysis_result(query, analysis)
+        parameters, parameterized_sql = cached_parameters
+        return (index, self._build_candidate(query, analysis, parameters, parameterized_sql))
+
+    def _is_below_threshold_locally(
+        self,
+        query: ExtractedQuery,
+        complexity_threshold: SQLComplexity,
+    ) -> bool:
+        """
+        Check whether local analysis already rules a query out.
+
+        The fallback analysis only reports SIMPLE when no JOINs, aggregations,
+        subqueries, CTEs, or window functions are present, and only MODERATE
+        when none of the COMPLEX markers are present, so a result below the
+        threshold means the LLM call can be skipped.
+
+        Args:
+            query: The query to check.
+            complexity_threshold: Minimum complexity to be considered a candidate.
+
+        Returns:
+            True if the query cannot meet the threshold and needs no LLM call.
+        """
+        analysis = self._fallback_analysis(query.sql)
+        if analysis.complexity >= complexity_threshold:
+            return False
+
+        logger.debug(
+            f"Skipping LLM analysis ({analysis.complexity.value} by local analysis): "
+            f"{query.question[:60]}..."
+        )
+        self._log_analysis_result(query, analysis)
+        return True
+
+    def _evaluate_batch(
+        self,
+        batch: list[tuple[int, ExtractedQuery]],
+        total: int,
+        complexity_threshold: SQLComplexity,
+    ) -> list[tuple[int, TrustedAssetCandidate | None]]:
+        """
+        Process a batch of queries with one LLM request (thread-safe worker function).
+
+        Falls back to analyzing each query individually if the batch request fails.
+
+        Args:
+            batch: (index, query) pairs to evaluate.
+            total: Total number of queries being evaluated.
+            complexity_threshold: Minimum complexity to be considered a candidate.
+
+        Returns:
+            List of (index, candidate_or_none) tuples to maintain order.
+        """
+        combined_results: list[CombinedAnalysis | None] | None = None
+        if len(batch) > 1:
+            logger.info(
+                f"Analyzing queries {batch[0][0] + 1}-{batch[-1][0] + 1}/{total} in one request"
+            )
+            combined_results = self.analyze_and_extract_batch(
+                [query for _, query in batch], complexity_threshold
+            )
+        if combined_results is None:
+            combined_results = [None] * len(batch)
+
+        results: list[tuple[int, TrustedAssetCandidate | None]] = []
+        for (index, query), combined in zip(batch, combined_results):
+            # A failing query must not discard the others in its batch
+            try:
+                results.append(
+                    self._evaluate_single_query(
+                        query,
+                        index,
+                        total,
+                        complexity_threshold,
+                        combined=combined,
+                    )
+                )
+            except Exception as e:
+                logger.error(f"Failed to evaluate query {index + 1}: {e}")
+                results.append((index, None))
+        return results
+
+    @contextmanager
+    def _evaluation_run(
+        self,
+        num_workers: int,
+        complexity_threshold: SQLComplexity,
+    ) -> Iterator[ThreadPoolExecutor]:
+        """
+        Set up the concurrency limiter and worker pool for one evaluation run.
+
+        Both live for the whole run, so backoff learned from rate limits
+        carries across every batch. Run statistics are logged once when the
+        run ends.
+
+        Args:
+            num_workers: Number of concurrent worker threads.
+            complexity_threshold: Minimum complexity to be considered a candidate.
+
+        Yields:
+            The executor that evaluates batches for this run.
+        """
+        num_workers = max(1, num_workers)
+        self._limiter = AdaptiveConcurrencyLimiter(
+            max_concurrency=min(num_workers, self.max_concurrency or num_workers)
+        )
+        self._run_counts = {"prefiltered": 0, "cached": 0}
+
+        executor = ThreadPoolExecutor(max_workers=num_workers)
+        logger.info(f"Thread pool started with {num_workers} max worker threads")
+        try:
+            yield executor
+        finally:
+            # Don't start queued batches if the consumer stops early
+            executor.shutdown(wait=True, cancel_futures=True)
+
+            if self._run_counts["prefiltered"]:
+                logger.info(
+                    f"Skipped LLM analysis for {self._run_counts['prefiltered']} queries "
+                    f"below the {complexity_threshold.value} threshold by local analysis"
+                )
+            if self._run_counts["cached"]:
+                logger.info(f"Resolved {self._run_counts['cached']} queries from the LLM cache")
+            if self.cache is not None:
+                logger.info(
+                    f"LLM cache: {self.cache.stats['hits']} hits, "
+                    f"{self.cache.stats['misses']} misses"
+                )
+            logger.info(f"LLM token usage: {self.token_usage.summary()}")
+
+    def _start_results(
+        self,
+        queries: list[ExtractedQuery],
+        complexity_threshold: SQLComplexity,
+        executor: ThreadPoolExecutor,
+    ) -> Iterator[tuple[int, TrustedAssetCandidate | None]]:
+        """
+        Submit queries for evaluation and return an iterator over their results.
+
+        Batches are submitted before this returns, so they run while the
+        caller goes on to read more input.
+
+        Args:
+            queries: List of extracted queries to evaluate.
+            complexity_threshold: Minimum complexity to be considered a candidate.
+            executor: The executor of the current evaluation run.
+
+        Returns:
+            Iterator of (index, candidate_or_none) tuples in completion order.
+        """
+        # Analyze each distinct SQL statement once; repeats share its result
+        unique_queries: list[tuple[int, ExtractedQuery]] = []
+        duplicates: dict[int, list[tuple[int, ExtractedQuery]]] = {}
+        first_index_by_sql: dict[int, int] = {}
+        for i, query in enumerate(queries):
+            first_index = first_index_by_sql.setdefault(self._sql_key(query.sql), i)
+            if first_index == i:
+                unique_queries.append((i, query))
+            else:
+                duplicates.setdefault(first_index, []).append((i, query))
+
+        if duplicates:
+            logger.debug(
+                f"Analyzing {len(unique_queries)} distinct SQL statements for "
+                f"{len(queries)} queries"
             )
 
-            candidate = TrustedAssetCandidate(
-                question=query.question,
-                sql=query.sql,
-                complexity=analysis,
-                execution_time_ms=query.execution_time_ms,
-                message_id=query.message_id,
-                conversation_id=query.conversation_id,
-                parameters=parameters,
-                parameterized_sql=parameterized_sql,
+        unique_results = self._start_unique_results(
+            unique_queries, len(queries), complexity_threshold, executor
+        )
+        return self._iter_with_duplicates(unique_results, duplicates)
+
+    def _iter_with_duplicates(
+        self,
+        unique_results: Iterator[tuple[int, TrustedAssetCandidate | None]],
+        duplicates: dict[int, list[tuple[int, ExtractedQuery]]],
+    ) -> Iterator[tuple[int, TrustedAssetCandidate | None]]:
+        """
+        Yield results of distinct queries along with those of their repeats.
+
+        Args:
+            unique_results: (index, candidate_or_none) tuples of distinct queries.
+            duplicates: Repeated (index, query) pairs keyed by the index of
+                the first query with the same SQL.
+
+        Yields:
+            (index, candidate_or_none) tuples in completion order.
+        """
+        for index, candidate in unique_results:
+            yield (index, candidate)
+            for duplicate_index, duplicate in duplicates.get(index, ()):
+                if candidate is None:
+                    yield (duplicate_index, None)
+                else:
+                    yield (
+                        duplicate_index,
+                        self._build_candidate(
+                            duplicate,
+                            candidate.complexity,
+                            candidate.parameters,
+                            candidate.parameterized_sql,
+                        ),
+                    )
+
+    def _start_unique_results(
+        self,
+        queries: list[tuple[int, ExtractedQuery]],
+        total: int,
+        complexity_threshold: SQLComplexity,
+        executor: ThreadPoolExecutor,
+    ) -> Iterator[tuple[int, TrustedAssetCandidate | None]]:
+        """
+        Submit distinct queries for evaluation and return an iterator over their results.
+
+        Args:
+            queries: (index, query) tuples with distinct SQL to evaluate.
+            total: Total number of queries in the run, for progress logging.
+            complexity_threshold: Minimum complexity to be considered a candidate.
+            executor: The executor of the current evaluation run.
+
+        Returns:
+            Iterator of (index, candidate_or_none) tuples in completion order.
+        """
+        # Only send queries to the LLM if local analysis can't rule them out
+        indexed_queries = [
+            (i, query)
+            for i, query in queries
+            if not (self.prefilter and self._is_below_threshold_locally(query, complexity_threshold))
+        ]
+        self._run_counts["prefiltered"] += len(queries) - len(indexed_queries)
+
+        # Answer what we can from results cached by earlier runs
+        resolved: list[tuple[int, TrustedAssetCandidate | None]] = []
+        if self.cache is not None:
+            uncached_queries = []
+            for index, query in indexed_queries:
+                cached_result = self._evaluate_from_cache(
+                    query, index, complexity_threshold
+                )
+                if cached_result is not None:
+                    resolved.append(cached_result)
+                else:
+                    uncached_queries.append((index, query))
+            self._run_counts["cached"] += len(resolved)
+            indexed_queries = uncached_queries
+
+        # Group queries so each LLM request carries up to batch_size of them
+        batches = [
+            indexed_queries[start : start + self.batch_size]
+            for start in range(0, len(indexed_queries), self.batch_size)
+        ]
+        if batches:
+            logger.debug(
+                f"Evaluating {len(indexed_queries)} queries for complexity in {len(batches)} batches"
             )
-            return (index, candidate)
 
-        return (index, None)
+        futures = {
+            executor.submit(
+                self._evaluate_batch,
+                batch,
+                total,
+                complexity_threshold,
+            ): batch
+            for batch in batches
+        }
+        return self._iter_completed(resolved, futures)
+
+    def _iter_completed(
+        self,
+        resolved: list[tuple[int, TrustedAssetCandidate | None]],
+        futures: dict[Future, list[tuple[int, ExtractedQuery]]],
+    ) -> Iterator[tuple[int, TrustedAssetCandidate | None]]:
+        """
+        Yield already resolved results, then the results of each batch as it completes.
+
+        Args:
+            resolved: (index, candidate_or_none) tuples that needed no LLM request.
+            futures: Submitted batch evaluations mapped to their (index, query) pairs.
+
+        Yields:
+            (index, candidate_or_none) tuples in completion order.
+        """
+        yield from resolved
+        for future in as_completed(futures):
+            try:
+                yield from future.result()
+            except Exception as e:
+                for index, _ in futures[future]:
+                    logger.error(f"Failed to evaluate query {index + 1}: {e}")
+                    yield (index, None)
+
+    def evaluate_queries_iter(
+        self,
+        queries: list[ExtractedQuery],
+        complexity_threshold: SQLComplexity = SQLComplexity.COMPLEX,
+        num_workers: int = 4,
+    ) -> Iterator[TrustedAssetCandidate]:
+        """
+        Evaluate queries and yield candidates as soon as each is ready.
+
+        Candidates are yielded in completion order, which is not the input
+        order; callers that need a stable order should sort the results or
+        use evaluate_queries().
+
+        Args:
+            queries: List of extracted queries to evaluate.
+            complexity_threshold: Minimum complexity to be considered a candidate.
+            num_workers: Number of concurrent worker threads (default: 4).
+
+        Yields:
+            TrustedAssetCandidate objects for complex queries.
+        """
+        if not queries:
+            logger.info("No queries to evaluate")
+            return
+
+        found = 0
+        with self._evaluation_run(num_workers, complexity_threshold) as executor:
+            for _, candidate in self._start_results(queries, complexity_threshold, executor):
+                if candidate is not None:
+                    found += 1
+                    yield candidate
+
+        logger.info(f"Found {found} complex queries out of {len(queries)} total")
+
+    def evaluate_queries_stream(
+        self,
+        queries: Iterable[ExtractedQuery],
+        complexity_threshold: SQLComplexity = SQLComplexity.COMPLEX,
+        num_workers: int = 4,
+        chunk_size: int | None = None,
+    ) -> Iterator[TrustedAssetCandidate]:
+        """
+        Evaluate queries from a (possibly lazy) iterable, chunk by chunk.
+
+        The next chunk is read and submitted while the current one is still
+        being evaluated, so evaluation overlaps with a producer that is still
+        extracting queries and workers stay busy across chunk boundaries. At
+        most two chunks of queries are held at a time. SQL already analyzed
+        in an earlier chunk reuses that result.
+
+        Args:
+            queries: Iterable of extracted queries to evaluate.
+            complexity_threshold: Minimum complexity to be considered a candidate.
+            num_workers: Number of concurrent worker threads (default: 4).
+            chunk_size: Queries evaluated per chunk (default: one full batch per worker).
+
+        Yields:
+            TrustedAssetCandidate objects for complex queries, in input order.
+        """
+        chunk_size = chunk_size or self.batch_size * max(1, num_workers)
+        query_iter = iter(queries)
+
+        # Earlier analysis per SQL statement: (complexity, parameters, parameterized SQL),
+        # or None if the statement was below the threshold or failed
+        previous_results: dict[
+            int, tuple[ComplexityAnalysis, list[SQLParameter], str | None] | None
+        ] = {}
+        # SQL submitted by a chunk whose results have not been collected yet
+        in_flight_keys: set[int] = set()
+        # Submitted chunks in input order, each as (chunk, results, pending
+        # positions, pending keys, positions deferred to an earlier chunk, result iterator)
+        in_flight: deque[tuple] = deque()
+        total = 0
+        found = 0
+        with self._evaluation_run(num_workers, complexity_threshold) as executor:
+            while True:
+                chunk = list(islice(query_iter, chunk_size))
+                if chunk:
+                    total += len(chunk)
+                    results: list[TrustedAssetCandidate | None] = [None] * len(chunk)
+
+                    # Answer repeats of earlier chunks directly, evaluate the rest
+                    pending: list[ExtractedQuery] = []
+                    pending_positions: list[int] = []
+                    pending_keys: list[int] = []
+                    deferred: list[tuple[int, int]] = []
+                    for position, query in enumerate(chunk):
+                        key = self._sql_key(query.sql)
+                        if key in previous_results:
+                            if previous_results[key] is not None:
+                                results[position] = self._build_candidate(
+                                    query, *previous_results[key]
+                                )
+                        elif key in in_flight_keys:
+                            # Resolved once the earlier chunk evaluating it is collected
+                            deferred.append((position, key))
+                        else:
+                            pending.append(query)
+                            pending_positions.append(position)
+                            pending_keys.append(key)
+                    in_flight_keys.update(pending_keys)
+
+                    result_iter = (
+                        self._start_results(pending, complexity_threshold, executor)
+                        if pending
+                        else iter(())
+                    )
+                    in_flight.append(
+                        (chunk, results, pending_positions, pending_keys, deferred, result_iter)
+                    )
+
+                    # Keep one chunk submitted ahead of the one being collected
+                    if len(in_flight) < 2:
+                        continue
+                elif not in_flight:
+                    break
+
+                chunk, results, pending_positions, pending_keys, deferred, result_iter = (
+                    in_flight.popleft()
+                )
+                for index, candidate in result_iter:
+                    results[pending_positions[index]] = candidate
+                    previous_results[pending_keys[index]] = (
+                        (candidate.complexity, candidate.parameters, candidate.parameterized_sql)
+                        if candidate is not None
+                        else None
+                    )
+                in_flight_keys.difference_update(pending_keys)
+
+                for position, key in deferred:
+                    earlier = previous_results.get(key)
+                    if earlier is not None:
+                        results[position] = self._build_candidate(chunk[position], *earlier)
+
+                for candidate in results:
+                    if candidate is not None:
+                        found += 1
+                        yield candidate
+
+        logger.info(f"Found {found} complex queries out of {total} total")
 
     def evaluate_queries(
         self,
@@ -379,47 +1355,14 @@ class ComplexityEvaluator:
             num_workers: Number of concurrent worker threads (default: 4).
 
         Returns:
-            List of TrustedAssetCandidate objects for complex queries.
+            List of TrustedAssetCandidate objects for complex queries, in input order.
         """
-        complexity_order = {
-            SQLComplexity.SIMPLE: 0,
-            SQLComplexity.MODERATE: 1,
-            SQLComplexity.COMPLEX: 2,
-        }
-        threshold_value = complexity_order[complexity_threshold]
-
-        logger.info(
-            f"Evaluating {len(queries)} queries for complexity using {num_workers} workers"
-        )
-
-        # Collect results with their original indices to maintain order
-        results: list[tuple[int, TrustedAssetCandidate | None]] = []
+        if not queries:
+            logger.info("No queries to evaluate")
+            return []
 
-        with ThreadPoolExecutor(max_workers=num_workers) as executor:
-            # Submit all queries for processing
-            futures = {
-                executor.submit(
-                    self._evaluate_single_query,
-                    query,
-                    i,
-                    len(queries),
-                    threshold_value,
-                    complexity_order,
-                ): i
-                for i, query in enumerate(queries)
-            }
-            
-            logger.info(f"Thread pool started: {len(futures)} tasks submitted with {num_workers} max worker threads")
-
-            # Collect results as they complete
-            for future in as_completed(futures):
-                try:
-                    result = future.result()
-                    results.append(result)
-                except Exception as e:
-                    index = futures[future]
-                    logger.error(f"Failed to evaluate query {index + 1}: {e}")
-                    results.append((index, None))
+        with self._evaluation_run(num_workers, complexity_threshold) as executor:
+            results = list(self._start_results(queries, complexity_threshold, executor))
 
         # Sort by index to maintain original order, then extract candidates
         results.sort(key=lambda x: x[0])
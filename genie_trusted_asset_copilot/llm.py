@@ -0,0 +1,322 @@
+"""
+Shared ChatDatabricks clients and resilient invocation helpers.
+
+Clients are memoized by configuration so every component (and every
+evaluator or creator instance) asking for the same model settings reuses
+one client instead of constructing its own. All clients send their
+requests through a single OpenAI client, so they share one authenticated
+connection pool across model settings and worker threads.
+Calls made through invoke_with_retry back off on rate limits and transient
+server errors, optionally throttled by an adaptive concurrency limiter.
+"""
+
+import threading
+import time
+from functools import lru_cache
+from typing import Any
+
+import openai
+from databricks.sdk import WorkspaceClient
+from databricks_langchain import ChatDatabricks
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import SystemMessage
+from langchain_core.outputs import ChatResult, LLMResult
+from langchain_core.runnables import Runnable
+from loguru import logger
+from openai.types.chat import ChatCompletion
+from pydantic import BaseModel
+from tenacity import (
+    RetryCallState,
+    Retrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+# Errors from the serving endpoint that are worth retrying
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+MAX_ATTEMPTS = 5
+
+
+@lru_cache(maxsize=1)
+def get_openai_client() -> openai.OpenAI:
+    """
+    Get the OpenAI client shared by every ChatDatabricks instance.
+
+    ChatDatabricks otherwise builds its own WorkspaceClient and HTTP client
+    per instance, each resolving authentication and opening its own
+    connections. The OpenAI client is thread-safe.
+
+    Returns:
+        The shared OpenAI client for Databricks model serving.
+    """
+    return WorkspaceClient().serving_endpoints.get_open_ai_client()
+
+
+class SharedClientChatDatabricks(ChatDatabricks):
+    """
+    ChatDatabricks that sends requests through the shared OpenAI client.
+
+    Responses keep the endpoint's full usage payload, including prompt cache
+    counts that ChatDatabricks drops, so TokenUsageTracker can report them.
+    """
+
+    @property
+    def client(self) -> openai.OpenAI:
+        """The shared OpenAI client."""
+        return get_openai_client()
+
+    def _convert_response_to_chat_result(self, response: ChatCompletion) -> ChatResult:
+        """Convert a chat completion, reporting its complete usage."""
+        result = super()._convert_response_to_chat_result(response)
+        usage = getattr(response, "usage", None)
+        if usage is not None and result.llm_output is not None:
+            result.llm_output["usage"] = usage.model_dump(exclude_none=True)
+        return result
+
+
+@lru_cache(maxsize=16)
+def get_llm(model: str, temperature: float, max_tokens: int) -> ChatDatabricks:
+    """
+    Get the shared ChatDatabricks client for a model configuration.
+
+    Args:
+        model: The Databricks model serving endpoint name.
+        temperature: LLM temperature.
+        max_tokens: Maximum tokens in the response.
+
+    Returns:
+        The shared ChatDatabricks instance.
+    """
+    return SharedClientChatDatabricks(model=model, temperature=temperature, max_tokens=max_tokens)
+
+
+@lru_cache(maxsize=32)
+def get_structured_llm(
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    schema: type[BaseModel],
+) -> Runnable:
+    """
+    Get the shared structured-output runnable for a model configuration and schema.
+
+    Args:
+        model: The Databricks model serving endpoint name.
+        temperature: LLM temperature.
+        max_tokens: Maximum tokens in the response.
+        schema: Pydantic model the response is parsed into.
+
+    Returns:
+        Runnable returning instances of the schema.
+    """
+    return get_llm(model, temperature, max_tokens).with_structured_output(schema)
+
+
+@lru_cache(maxsize=32)
+def cached_system_message(prompt: str, model: str) -> SystemMessage:
+    """
+    Get the shared system message for a prompt, marked as a prompt-cache breakpoint.
+
+    The system prompts are static and always sent first, so the serving
+    endpoint can reuse the cached prefix instead of re-processing it on
+    every call. Per-call input stays in the human message after it. Each
+    prompt's message is built once, so every request sends identical bytes.
+    The returned message is shared and must not be modified.
+
+    Only Claude endpoints understand cache_control breakpoints; other
+    endpoints get the prompt as plain text.
+
+    Args:
+        prompt: The static system prompt text.
+        model: The Databricks model serving endpoint the message is sent to.
+
+    Returns:
+        SystemMessage whose content carries an ephemeral cache_control block
+        for Claude endpoints, or the plain prompt otherwise.
+    """
+    if "claude" not in model.lower():
+        return SystemMessage(content=prompt)
+    return SystemMessage(
+        content=[{"type": "text", "text": prompt, "cache_control": {"type": "ephemeral"}}]
+    )
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limiter for concurrent LLM requests.
+
+    The allowed concurrency grows by roughly one request per round of
+    successful calls and halves when the endpoint starts rate limiting,
+    so throughput settles near the provider's limit instead of collapsing
+    under retries.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        decrease_cooldown_seconds: float = 10.0,
+    ) -> None:
+        """
+        Initialize the limiter at full concurrency.
+
+        Args:
+            max_concurrency: Upper bound on concurrent requests.
+            min_concurrency: Lower bound the limit never drops below.
+            decrease_cooldown_seconds: Minimum time between decreases, so a
+                burst of rate limits from one window halves the limit once.
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.decrease_cooldown_seconds = decrease_cooldown_seconds
+
+        self._limit = float(self.max_concurrency)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight."""
+        return max(self.min_concurrency, int(self._limit))
+
+    def __enter__(self) -> "AdaptiveConcurrencyLimiter":
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self) -> None:
+        """Additively increase the limit after a successful request."""
+        with self._condition:
+            if self._limit < self.max_concurrency:
+                self._limit = min(self.max_concurrency, self._limit + 1 / self._limit)
+                self._condition.notify_all()
+
+    def on_rate_limited(self) -> None:
+        """Multiplicatively decrease the limit after a rate-limit response."""
+        with self._condition:
+            now = time.monotonic()
+            if now - self._last_decrease < self.decrease_cooldown_seconds:
+                return
+            self._last_decrease = now
+            previous_limit = self.limit
+            self._limit = max(float(self.min_concurrency), self._limit / 2)
+            if self.limit < previous_limit:
+                logger.warning(f"LLM endpoint is rate limiting, reducing concurrency to {self.limit}")
+
+
+class TokenUsageTracker(BaseCallbackHandler):
+    """
+    Callback handler that aggregates token usage across LLM calls.
+
+    Usage comes from the raw chat completion (see SharedClientChatDatabricks).
+    Prompt cache reads are reported by Claude endpoints as
+    cache_read_input_tokens and by OpenAI-compatible ones as
+    prompt_tokens_details.cached_tokens; cache writes only by Claude.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the tracker with zeroed counters."""
+        self._lock = threading.Lock()
+        self.stats: dict[str, int] = {
+            "requests": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "cache_read_tokens": 0,
+            "cache_write_tokens": 0,
+        }
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        """Add the usage reported for a completed LLM call."""
+        usage = (response.llm_output or {}).get("usage") or {}
+        prompt_details = usage.get("prompt_tokens_details") or {}
+
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["prompt_tokens"] += usage.get("prompt_tokens") or 0
+            self.stats["completion_tokens"] += usage.get("completion_tokens") or 0
+            self.stats["total_tokens"] += usage.get("total_tokens") or 0
+            self.stats["cache_read_tokens"] += (
+                usage.get("cache_read_input_tokens") or prompt_details.get("cached_tokens") or 0
+            )
+            self.stats["cache_write_tokens"] += usage.get("cache_creation_input_tokens") or 0
+
+    def summary(self) -> str:
+        """Format the aggregated usage for logging."""
+        summary = (
+            f"{self.stats['requests']} requests, "
+            f"{self.stats['prompt_tokens']} prompt tokens, "
+            f"{self.stats['completion_tokens']} completion tokens"
+        )
+        if self.stats["cache_read_tokens"] or self.stats["cache_write_tokens"]:
+            summary += (
+                f", {self.stats['cache_read_tokens']} cache read tokens, "
+                f"{self.stats['cache_write_tokens']} cache write tokens"
+            )
+        return summary
+
+
+def invoke_with_retry(
+    runnable: Runnable,
+    messages: Any,
+    limiter: AdaptiveConcurrencyLimiter | None = None,
+    callbacks: list[BaseCallbackHandler] | None = None,
+) -> Any:
+    """
+    Invoke a runnable, retrying rate limits and transient errors with backoff.
+
+    Uses jittered exponential backoff (up to 30 seconds between attempts,
+    MAX_ATTEMPTS attempts in total). Non-retryable errors and the final
+    failed attempt are raised to the caller.
+
+    Args:
+        runnable: The LLM or structured-output runnable to invoke.
+        messages: Input passed to runnable.invoke().
+        limiter: Optional limiter that throttles concurrent calls and adapts
+            to rate limiting.
+        callbacks: Optional callback handlers for the call, such as a
+            TokenUsageTracker.
+
+    Returns:
+        The runnable's result.
+    """
+
+    def _before_sleep(retry_state: RetryCallState) -> None:
+        error = retry_state.outcome.exception() if retry_state.outcome else None
+        if limiter is not None and isinstance(error, openai.RateLimitError):
+            limiter.on_rate_limited()
+        logger.debug(
+            f"LLM call failed (attempt {retry_state.attempt_number}/{MAX_ATTEMPTS}), retrying: {error}"
+        )
+
+    config = {"callbacks": callbacks} if callbacks else None
+
+    for attempt in Retrying(
+        wait=wait_random_exponential(multiplier=1, max=30),
+        stop=stop_after_attempt(MAX_ATTEMPTS),
+        retry=retry_if_exception_type(RETRYABLE_ERRORS),
+        before_sleep=_before_sleep,
+        reraise=True,
+    ):
+        with attempt:
+            if limiter is None:
+                return runnable.invoke(messages, config=config)
+            with limiter:
+                result = runnable.invoke(messages, config=config)
+            limiter.on_success()
+            return result
@@ -0,0 +1,126 @@
+"""
+Persistent cache for deterministic LLM responses.
+
+LLM calls made with temperature 0 are deterministic functions of the model
+and prompt, so their structured results can be reused across runs. This
+module stores them in a small SQLite database on local disk.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import orjson
+from loguru import logger
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "genie-trusted-asset-copilot" / "llm_cache.sqlite3"
+
+# Cached entries expire after 7 days by default
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+class LLMCache:
+    """SQLite-backed key/value cache for LLM responses with TTL expiry."""
+
+    def __init__(
+        self,
+        path: str | Path = DEFAULT_CACHE_PATH,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ) -> None:
+        """
+        Initialize the LLM response cache.
+
+        If the cache database cannot be opened, the cache is disabled and
+        every lookup is a miss.
+
+        Args:
+            path: Location of the SQLite database file.
+            ttl_seconds: Time-to-live for cached entries in seconds.
+        """
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.stats: dict[str, int] = {"hits": 0, "misses": 0}
+
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"LLM cache disabled, could not open {self.path}: {e}")
+            self._conn = None
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """
+        Build a cache key from the parts that determine an LLM response.
+
+        Args:
+            parts: Strings such as the model name, call type, and prompt input.
+
+        Returns:
+            SHA-256 hex digest of the joined parts.
+        """
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        """
+        Look up a cached response.
+
+        Args:
+            key: The cache key from make_key().
+
+        Returns:
+            The cached value, or None on a miss or expired entry.
+        """
+        if self._conn is None:
+            return None
+
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] < time.time():
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                    row = None
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache read failed: {e}")
+                row = None
+
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            self.stats["hits"] += 1
+            return orjson.loads(row[0])
+
+    def set(self, key: str, value: dict) -> None:
+        """
+        Store a response in the cache.
+
+        Args:
+            key: The cache key from make_key().
+            value: JSON-serializable response data.
+        """
+        if self._conn is None:
+            return
+
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, orjson.dumps(value).decode(), time.time() + self.ttl_seconds),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache write failed: {e}")
@@ -10,14 +10,23 @@ import sys
 
 from loguru import logger
 
+# Level of the stdout handler added by configure_logging, None until configured
+_configured_level: str | None = None
+
 
 def configure_logging(level: str = "INFO") -> None:
     """
     Configure loguru for stdout-only logging.
 
+    Repeat calls with the same level are no-ops.
+
     Args:
         level: The minimum log level to display (default: INFO).
     """
+    global _configured_level
+    if _configured_level == level:
+        return
+
     # Remove default handler
     logger.remove()
 
@@ -34,8 +43,11 @@ def configure_logging(level: str = "INFO") -> None:
         colorize=True,
     )
 
-    # Suppress noisy third-party library logs
-    _suppress_third_party_logs()
+    # Suppress noisy third-party library logs (levels persist, so only once)
+    if _configured_level is None:
+        _suppress_third_party_logs()
+
+    _configured_level = level
 
 
 def _suppress_third_party_logs() -> None:
@@ -54,3 +66,6 @@ def _suppress_third_party_logs() -> None:
     # Suppress LangChain verbose logs
     logging.getLogger("langchain").setLevel(logging.WARNING)
     logging.getLogger("langchain_core").setLevel(logging.WARNING)
+
+    # Suppress sqlglot warnings about unsupported syntax
+    logging.getLogger("sqlglot").setLevel(logging.ERROR)
@@ -8,8 +8,12 @@ assets and Unity Catalog functions.
 
 import argparse
 import sys
+from collections.abc import Iterator
 from datetime import datetime, timezone
+from itertools import chain
 
+from databricks.sdk import WorkspaceClient
+from databricks.sdk.config import Config
 from loguru import logger
 
 from genie_trusted_asset_copilot.complexity_evaluator import ComplexityEvaluator
@@ -17,9 +21,18 @@ from genie_trusted_asset_copilot.conversation_reader import (
     ConversationReader,
     parse_timestamp,
 )
+from genie_trusted_asset_copilot.llm_cache import DEFAULT_TTL_SECONDS, LLMCache
 from genie_trusted_asset_copilot.logging_config import configure_logging
-from genie_trusted_asset_copilot.models import ProcessingReport, SQLComplexity
-from genie_trusted_asset_copilot.trusted_asset_creator import TrustedAssetCreator
+from genie_trusted_asset_copilot.models import (
+    ExtractedQuery,
+    ProcessingReport,
+    SQLComplexity,
+    TrustedAssetCandidate,
+)
+from genie_trusted_asset_copilot.trusted_asset_creator import TAG_WORKERS, TrustedAssetCreator
+
+# Connections the Databricks SDK keeps open by default
+DEFAULT_HTTP_POOL_SIZE = 20
 
 
 def run(
@@ -39,6 +52,11 @@ def run(
     from_timestamp: int | None = None,
     to_timestamp: int | None = None,
     num_workers: int = 4,
+    batch_size: int = 8,
+    max_concurrency: int | None = None,
+    prefilter: bool = True,
+    use_cache: bool = True,
+    cache_ttl_seconds: int = DEFAULT_TTL_SECONDS,
 ) -> ProcessingReport:
     """
     Run the trusted asset creation workflow.
@@ -60,46 +78,107 @@ def run(
         from_timestamp: Optional start timestamp in milliseconds (inclusive).
         to_timestamp: Optional end timestamp in milliseconds (inclusive).
         num_workers: Number of concurrent worker threads for processing (default: 4).
+        batch_size: Number of queries sent per complexity analysis LLM request (default: 8).
+        max_concurrency: Maximum concurrent complexity analysis LLM requests
+            (default: one per worker).
+        prefilter: Skip LLM analysis for queries that local SQL analysis already
+            places below the complexity threshold.
+        use_cache: Reuse LLM results (complexity analysis, usage guidance, function
+            descriptions) cached on disk by earlier runs.
+        cache_ttl_seconds: Time-to-live for cached analysis results in seconds.
 
     Returns:
         ProcessingReport with summary statistics.
     """
-    logger.info("Starting Genie Trusted Asset Copilot")
-    logger.info(f"Space ID: {space_id}")
-    logger.info(f"Target catalog.schema: {catalog}.{schema}")
-    logger.info(f"Complexity threshold: {complexity_threshold}")
-    logger.info(f"Dry run: {dry_run}")
+    logger.info(
+        "\n".join(
+            [
+                "Starting Genie Trusted Asset Copilot",
+                f"Space ID: {space_id}",
+                f"Target catalog.schema: {catalog}.{schema}",
+                f"Complexity threshold: {complexity_threshold}",
+                f"Dry run: {dry_run}",
+            ]
+        )
+    )
 
     errors: list[str] = []
 
-    # Step 1: Read conversations and extract SQL queries
+    # One SDK client for every Databricks API call in the run, so reading
+    # conversations and creating assets reuse the same keep-alive connections.
+    # The pool is sized for the busiest phase: function creation workers
+    # and tag submissions.
+    pool_size = max(DEFAULT_HTTP_POOL_SIZE, num_workers + TAG_WORKERS)
+    client = WorkspaceClient(
+        config=Config(max_connection_pools=pool_size, max_connections_per_pool=pool_size)
+    )
+
+    # Steps 1-2: Extract SQL queries and analyze their complexity as they arrive
     logger.info("Step 1: Reading conversations and extracting SQL queries...")
     reader = ConversationReader(
         space_id=space_id,
+        client=client,
         include_all_users=include_all_users,
         from_timestamp=from_timestamp,
         to_timestamp=to_timestamp,
+        num_workers=num_workers,
+        # Each page is read once per run, so caching would only hold memory
+        page_cache_ttl_seconds=0,
     )
 
+    logger.info("Step 2: Analyzing SQL complexity as queries are extracted...")
+    cache = LLMCache(ttl_seconds=cache_ttl_seconds) if use_cache else None
+    evaluator = ComplexityEvaluator(
+        model=model,
+        batch_size=batch_size,
+        cache=cache,
+        max_concurrency=max_concurrency,
+        prefilter=prefilter,
+    )
+    threshold = SQLComplexity(complexity_threshold.lower())
+
+    queries_extracted = 0
+    extraction_failed = False
+
+    def count_queries(queries: Iterator[ExtractedQuery]) -> Iterator[ExtractedQuery]:
+        """Pass queries through to the evaluator, counting them and flagging extraction errors."""
+        nonlocal queries_extracted, extraction_failed
+        try:
+            for query in queries:
+                queries_extracted += 1
+                yield query
+        except Exception:
+            extraction_failed = True
+            raise
+
+    candidates: list[TrustedAssetCandidate] = []
     try:
-        queries = reader.extract_all_queries(max_conversations=max_conversations)
+        for candidate in evaluator.evaluate_queries_stream(
+            count_queries(reader.iter_all_queries(max_conversations=max_conversations)),
+            complexity_threshold=threshold,
+            num_workers=num_workers,
+        ):
+            candidates.append(candidate)
     except Exception as e:
-        error_msg = f"Failed to extract queries: {e}"
+        if extraction_failed:
+            error_msg = f"Failed to extract queries: {e}"
+        else:
+            error_msg = f"Failed to evaluate query complexity: {e}"
         logger.error(error_msg)
         errors.append(error_msg)
-        return ProcessingReport(
-            total_conversations=0,
-            total_messages=0,
-            queries_extracted=0,
-            complex_queries=0,
+        return ProcessingReport.model_construct(
+            total_conversations=0 if extraction_failed else max_conversations or queries_extracted,
+            total_messages=0 if extraction_failed else queries_extracted,
+            queries_extracted=queries_extracted,
+            complex_queries=len(candidates),
             trusted_assets_created=0,
             uc_functions_created=0,
             errors=errors,
         )
 
-    if not queries:
+    if not queries_extracted:
         logger.warning("No SQL queries found in conversations")
-        return ProcessingReport(
+        return ProcessingReport.model_construct(
             total_conversations=max_conversations or 0,
             total_messages=0,
             queries_extracted=0,
@@ -109,23 +188,14 @@ def run(
             errors=errors,
         )
 
-    logger.info(f"Extracted {len(queries)} SQL queries")
-
-    # Step 2: Analyze complexity
-    logger.info("Step 2: Analyzing SQL complexity...")
-    evaluator = ComplexityEvaluator(model=model)
-
-    threshold = SQLComplexity(complexity_threshold.lower())
-    candidates = evaluator.evaluate_queries(
-        queries, complexity_threshold=threshold, num_workers=num_workers
-    )
+    logger.info(f"Extracted {queries_extracted} SQL queries")
 
     if not candidates:
         logger.warning(f"No queries met the {complexity_threshold} complexity threshold")
-        return ProcessingReport(
+        return ProcessingReport.model_construct(
             total_conversations=max_conversations or 0,
-            total_messages=len(queries),
-            queries_extracted=len(queries),
+            total_messages=queries_extracted,
+            queries_extracted=queries_extracted,
             complex_queries=0,
             trusted_assets_created=0,
             uc_functions_created=0,
@@ -140,7 +210,9 @@ def run(
         space_id=space_id,
         catalog=catalog,
         schema=schema,
+        client=client,
         warehouse_id=warehouse_id,
+        cache=cache,
     )
 
     trusted_results, uc_results, register_results = creator.create_all(
@@ -159,15 +231,17 @@ def run(
     uc_registered = sum(1 for r in register_results if r.success)
 
     # Collect errors
-    for result in trusted_results + uc_results + register_results:
-        if not result.success and result.error:
-            errors.append(f"{result.asset_type} '{result.name}': {result.error}")
-
-    # Build report
-    report = ProcessingReport(
-        total_conversations=max_conversations or len(queries),
-        total_messages=len(queries),
-        queries_extracted=len(queries),
+    errors.extend(
+        f"{result.asset_type} '{result.name}': {result.error}"
+        for result in chain(trusted_results, uc_results, register_results)
+        if not result.success and result.error
+    )
+
+    # Build report (all fields are internal counters, so validation is skipped)
+    report = ProcessingReport.model_construct(
+        total_conversations=max_conversations or queries_extracted,
+        total_messages=queries_extracted,
+        queries_extracted=queries_extracted,
         complex_queries=len(candidates),
         trusted_assets_created=trusted_created,
         uc_functions_created=uc_created,
@@ -175,21 +249,27 @@ def run(
         errors=errors,
     )
 
-    # Log summary
-    logger.info("=" * 60)
-    logger.info("Processing Complete - Summary")
-    logger.info("=" * 60)
-    logger.info(f"Queries extracted: {report.queries_extracted}")
-    logger.info(f"Complex queries found: {report.complex_queries}")
-    logger.info(f"Trusted assets created: {report.trusted_assets_created}")
-    logger.info(f"UC functions created: {report.uc_functions_created}")
-    logger.info(f"UC functions registered: {report.uc_functions_registered}")
+    # Log summary, one record per block rather than per line
+    logger.info(
+        "\n".join(
+            [
+                "=" * 60,
+                "Processing Complete - Summary",
+                "=" * 60,
+                f"Queries extracted: {report.queries_extracted}",
+                f"Complex queries found: {report.complex_queries}",
+                f"Trusted assets created: {report.trusted_assets_created}",
+                f"UC functions created: {report.uc_functions_created}",
+                f"UC functions registered: {report.uc_functions_registered}",
+            ]
+        )
+    )
     if errors:
-        logger.warning(f"Errors encountered: {len(errors)}")
-        for err in errors[:5]:  # Show first 5 errors
-            logger.warning(f"  - {err}")
+        error_lines = [f"Errors encountered: {len(errors)}"]
+        error_lines.extend(f"  - {err}" for err in errors[:5])  # Show first 5 errors
         if len(errors) > 5:
-            logger.warning(f"  ... and {len(errors) - 5} more errors")
+            error_lines.append(f"  ... and {len(errors) - 5} more errors")
+        logger.warning("\n".join(error_lines))
     logger.info("=" * 60)
 
     return report
@@ -304,6 +384,36 @@ Examples:
         default=4,
         help="Number of concurrent worker threads for processing (default: 4).",
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=8,
+        help="Number of queries sent per complexity analysis LLM request (default: 8, max: 16).",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=None,
+        help="Maximum concurrent complexity analysis LLM requests (default: one per worker).",
+    )
+    parser.add_argument(
+        "--prefilter",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Skip LLM analysis for queries local SQL analysis places below the threshold (default: enabled).",
+    )
+    parser.add_argument(
+        "--cache",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Reuse LLM results cached on disk by earlier runs (default: enabled).",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=DEFAULT_TTL_SECONDS,
+        help=f"Time-to-live for cached analysis results in seconds (default: {DEFAULT_TTL_SECONDS}, 7 days).",
+    )
     parser.add_argument(
         "--verbose",
         "-v",
@@ -369,6 +479,11 @@ Examples:
             from_timestamp=from_ts,
             to_timestamp=to_ts,
             num_workers=args.num_workers,
+            batch_size=args.batch_size,
+            max_concurrency=args.max_concurrency,
+            prefilter=args.prefilter,
+            use_cache=args.cache,
+            cache_ttl_seconds=args.cache_ttl,
         )
 
         # Return non-zero if there were errors
@@ -1,12 +1,15 @@
 """
 Data models for Genie Trusted Asset Copilot.
 
-All models use Pydantic for strong typing and validation.
+All models use Pydantic for strong typing and validation. High-volume
+records that never round-trip through LLM JSON are slotted Pydantic
+dataclasses, which validate the same way but use far less memory.
 """
 
 from enum import Enum
 
 from pydantic import BaseModel, Field
+from pydantic.dataclasses import dataclass
 
 
 class SQLComplexity(str, Enum):
@@ -16,8 +19,41 @@ class SQLComplexity(str, Enum):
     MODERATE = "moderate"
     COMPLEX = "complex"
 
-
-class ExtractedQuery(BaseModel):
+    def __init__(self, value: str) -> None:
+        # Members are created in definition order, so the count so far is this
+        # member's rank. Storing it on the member keeps comparisons to a plain
+        # int compare instead of a dict lookup through Enum.__hash__.
+        self._rank = len(type(self).__members__)
+
+    @property
+    def rank(self) -> int:
+        """Numeric position of this level (SIMPLE=0, MODERATE=1, COMPLEX=2)."""
+        return self._rank
+
+    # Compare by complexity rank rather than the string values
+    def __lt__(self, other: object) -> bool:
+        if not isinstance(other, SQLComplexity):
+            return NotImplemented
+        return self._rank < other._rank
+
+    def __le__(self, other: object) -> bool:
+        if not isinstance(other, SQLComplexity):
+            return NotImplemented
+        return self._rank <= other._rank
+
+    def __gt__(self, other: object) -> bool:
+        if not isinstance(other, SQLComplexity):
+            return NotImplemented
+        return self._rank > other._rank
+
+    def __ge__(self, other: object) -> bool:
+        if not isinstance(other, SQLComplexity):
+            return NotImplemented
+        return self._rank >= other._rank
+
+
+@dataclass(slots=True, kw_only=True)
+class ExtractedQuery:
     """A SQL query extracted from a Genie conversation message."""
 
     question: str = Field(description="The user's original question")
@@ -59,11 +95,16 @@ class ParameterExtraction(BaseModel):
     )
 
 
-class ComplexityAnalysis(BaseModel):
-    """LLM-generated analysis of SQL query complexity."""
+class ComplexityClassification(BaseModel):
+    """LLM-generated complexity classification of a SQL query."""
 
     complexity: SQLComplexity = Field(description="Overall complexity classification")
     reasoning: str = Field(description="Explanation of the complexity assessment")
+
+
+class ComplexityAnalysis(ComplexityClassification):
+    """Complexity classification with structural features read from the parsed SQL."""
+
     has_joins: bool = Field(default=False, description="Contains JOIN operations")
     has_subqueries: bool = Field(default=False, description="Contains subqueries")
     has_ctes: bool = Field(default=False, description="Contains CTEs (WITH clauses)")
@@ -76,6 +117,65 @@ class ComplexityAnalysis(BaseModel):
     join_count: int = Field(default=0, description="Number of JOIN operations")
 
 
+class CombinedAnalysis(BaseModel):
+    """LLM-generated complexity analysis and parameter extraction in a single response."""
+
+    complexity: ComplexityClassification = Field(
+        description="Complexity classification of the query"
+    )
+    parameters: list[SQLParameter] = Field(
+        default_factory=list,
+        description="Extracted parameters (empty if the query is below the threshold)",
+    )
+    parameterized_sql: str | None = Field(
+        default=None,
+        description="SQL with parameter placeholders (null if the query is below the threshold)",
+    )
+
+
+class BatchCombinedAnalysis(BaseModel):
+    """LLM-generated combined analyses for several SQL queries sent in one request."""
+
+    results: list[CombinedAnalysis] = Field(
+        default_factory=list,
+        description="One analysis per query, in the same order as the queries were given",
+    )
+
+
+class AssetText(BaseModel):
+    """LLM-generated usage guidance and function description for one trusted asset."""
+
+    usage_guidance: str = Field(description="Usage guidance for the query (2-4 sentences)")
+    description: str = Field(
+        description="Plain-text description of what the query does and returns (1-2 sentences)"
+    )
+
+
+class BatchAssetText(BaseModel):
+    """LLM-generated text for several trusted assets sent in one request."""
+
+    results: list[AssetText] = Field(
+        default_factory=list,
+        description="One result per query, in the same order as the queries were given",
+    )
+
+
+@dataclass(slots=True, kw_only=True)
+class SimpleSelect:
+    """The parts of a plain single-table SELECT, rendered as SQL text."""
+
+    table: str = Field(description="Fully qualified name of the table read")
+    columns: list[str] = Field(description="Selected column names, with '*' for a star")
+    distinct: bool = Field(default=False, description="Whether duplicate rows are removed")
+    filters: list[str] = Field(
+        default_factory=list, description="WHERE conditions, which must all hold"
+    )
+    order_by: list[str] = Field(
+        default_factory=list, description="ORDER BY terms, with their direction"
+    )
+    limit: str | None = Field(default=None, description="Maximum number of rows returned")
+
+
 class TrustedAssetCandidate(BaseModel):
     """A candidate for promotion to a Genie trusted asset."""
 
@@ -95,7 +195,8 @@ class TrustedAssetCandidate(BaseModel):
     )
 
 
-class QueryParameter(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class QueryParameter:
     """A parameter definition for a Genie example SQL query."""
 
     name: str = Field(description="The parameter name used in SQL (e.g., 'site_name')")
@@ -151,7 +252,8 @@ class GenieSpaceConfig(BaseModel):
     )
 
 
-class CreationResult(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class CreationResult:
     """Result of creating a trusted asset or UC function."""
 
     success: bool = Field(description="Whether creation was successful")
@@ -0,0 +1,296 @@
+"""
+SQL parsing helpers built on sqlglot.
+
+This module parses Databricks SQL into an AST so structural features
+(JOINs, subqueries, CTEs, window functions) can be read from the query
+itself rather than from keyword matches that also hit string literals.
+"""
+
+import re
+from functools import lru_cache
+
+from loguru import logger
+from sqlglot import exp
+from sqlglot.dialects.dialect import Dialect
+from sqlglot.errors import ErrorLevel, SqlglotError
+from sqlglot.tokens import TokenType
+
+from genie_trusted_asset_copilot.models import SimpleSelect
+
+# Dialect used for all SQL produced by Genie
+DIALECT = "databricks"
+
+# Shared dialect instance; it holds no per-query state, and resolving the
+# name on every call builds a new instance each time
+SQL_DIALECT = Dialect.get_or_raise(DIALECT)
+
+# Named parameter marker such as :start_date
+PARAMETER_MARKER_PATTERN = re.compile(r":(\w+)")
+PARAMETER_NAME_PATTERN = re.compile(r"\w+")
+
+# Tokens that start a JSON path when a colon directly follows them
+JSON_PATH_TOKENS = frozenset({TokenType.VAR, TokenType.IDENTIFIER, TokenType.R_BRACKET})
+
+# SELECT clauses a simple select may use; older sqlglot versions name FROM "from"
+SIMPLE_SELECT_CLAUSES = frozenset({"expressions", "from", "from_", "where", "order", "limit", "distinct"})
+
+
+def parse_sql(sql: str, copy: bool = True) -> exp.Expression | None:
+    """
+    Parse a single Databricks SQL statement.
+
+    Parsed trees are memoized on the SQL text. By default each call returns
+    its own copy so callers are free to modify it; read-only callers can
+    pass copy=False to share the memoized tree instead.
+
+    Args:
+        sql: The SQL statement to parse.
+        copy: Return a private copy of the tree. Callers passing False must
+            not modify the returned tree.
+
+    Returns:
+        The parsed expression, or None if the SQL cannot be parsed or
+        contains more than one statement.
+    """
+    tree = _parse_cached(sql)
+    if tree is None or not copy:
+        return tree
+    return tree.copy()
+
+
+@lru_cache(maxsize=4096)
+def _parse_cached(sql: str) -> exp.Expression | None:
+    """
+    Parse a single Databricks SQL statement, memoized on the SQL text.
+
+    The returned tree is shared between callers and must not be modified.
+
+    Args:
+        sql: The SQL statement to parse.
+
+    Returns:
+        The parsed expression, or None if the SQL cannot be parsed or
+        contains more than one statement.
+    """
+    try:
+        statements = [s for s in SQL_DIALECT.parse(sql) if s is not None]
+    except SqlglotError as e:
+        logger.debug(f"Could not parse SQL: {str(e).splitlines()[0]}")
+        return None
+
+    if len(statements) != 1:
+        return None
+    return statements[0]
+
+
+@lru_cache(maxsize=4096)
+def fingerprint_sql(sql: str) -> str:
+    """
+    Reduce a SQL statement to its structural template.
+
+    Literal values are replaced with placeholders and the SQL is rendered in
+    normalized form, so queries that differ only in filter values (dates,
+    names, thresholds) share a fingerprint.
+
+    Args:
+        sql: The SQL statement.
+
+    Returns:
+        The normalized template, or the whitespace-normalized SQL if it
+        cannot be parsed.
+    """
+    tree = parse_sql(sql)
+    if tree is None:
+        return " ".join(sql.split())
+
+    for literal in list(tree.find_all(exp.Literal)):
+        literal.replace(exp.Placeholder())
+    return tree.sql(dialect=SQL_DIALECT, normalize=True).lower()
+
+
+def format_sql(sql: str) -> str | None:
+    """
+    Pretty-print a SQL statement with uppercase keywords.
+
+    Rendering reuses the memoized parse tree. If the statement uses syntax
+    the generator cannot reproduce, None is returned rather than a lossy
+    rendering.
+
+    Args:
+        sql: The SQL statement.
+
+    Returns:
+        The formatted SQL, or None if it cannot be parsed or rendered faithfully.
+    """
+    tree = parse_sql(sql, copy=False)
+    if tree is None:
+        return None
+
+    try:
+        return tree.sql(dialect=SQL_DIALECT, pretty=True, unsupported_level=ErrorLevel.RAISE)
+    except SqlglotError as e:
+        logger.debug(f"Could not format SQL: {str(e).splitlines()[0]}")
+        return None
+
+
+def simple_select_parts(sql: str) -> SimpleSelect | None:
+    """
+    Recognize a plain single-table SELECT and break it into its parts.
+
+    A query qualifies when it reads one table with no joins, subqueries,
+    CTEs, set operations, aggregations, or window functions, and uses no
+    clauses beyond WHERE, ORDER BY, LIMIT, and DISTINCT.
+
+    Args:
+        sql: The SQL statement.
+
+    Returns:
+        The table, columns, filters, ordering, and limit of the query, or
+        None if the query is not a plain single-table SELECT.
+    """
+    tree = parse_sql(sql, copy=False)
+    if not isinstance(tree, exp.Select):
+        return None
+    if any(value for key, value in tree.args.items() if key not in SIMPLE_SELECT_CLAUSES):
+        return None
+    distinct = tree.args.get("distinct")
+    if distinct is not None and distinct.args.get("on") is not None:
+        return None
+    if tree.find(exp.Join, exp.Subquery, exp.With, exp.AggFunc, exp.Window):
+        return None
+    if any(select is not tree for select in tree.find_all(exp.Select)):
+        return None
+
+    tables = list(tree.find_all(exp.Table))
+    if len(tables) != 1:
+        return None
+
+    where = tree.args.get("where")
+    order = tree.args.get("order")
+    limit = tree.args.get("limit")
+
+    conditions: list[exp.Expression] = []
+    if where is not None:
+        condition = where.this.unnest()
+        conditions = list(condition.flatten()) if isinstance(condition, exp.And) else [condition]
+    return SimpleSelect(
+        table=".".join(part.name for part in tables[0].parts),
+        columns=[
+            "*"
+            if isinstance(column, exp.Star)
+            else column.alias_or_name or column.sql(dialect=SQL_DIALECT)
+            for column in tree.expressions
+        ],
+        distinct=distinct is not None,
+        filters=[_render_condition(condition) for condition in conditions],
+        order_by=[term.sql(dialect=SQL_DIALECT) for term in order.expressions]
+        if order is not None
+        else [],
+        limit=limit.expression.sql(dialect=SQL_DIALECT) if limit is not None else None,
+    )
+
+
+def _render_condition(condition: exp.Expression) -> str:
+    """
+    Render one condition of an AND-ed WHERE clause.
+
+    Args:
+        condition: The condition.
+
+    Returns:
+        The condition as SQL, parenthesized if it is an OR so it still
+        reads correctly when joined with the other conditions.
+    """
+    condition = condition.unnest()
+    rendered = condition.sql(dialect=SQL_DIALECT)
+    return f"({rendered})" if isinstance(condition, exp.Or) else rendered
+
+
+def summarize_sql(sql: str, max_chars: int = 2000, max_in_values: int = 3) -> str:
+    """
+    Shorten a long SQL statement while keeping its structure.
+
+    Long IN (...) value lists are collapsed to their first few values and a
+    count of the rest. If the result is still too long it is truncated.
+    Statements within max_chars are returned unchanged.
+
+    Args:
+        sql: The SQL statement.
+        max_chars: Length above which the SQL is summarized.
+        max_in_values: Number of values kept from each long IN list.
+
+    Returns:
+        The summarized SQL.
+    """
+    if len(sql) <= max_chars:
+        return sql
+
+    tree = parse_sql(sql)
+    if tree is not None:
+        for in_expr in tree.find_all(exp.In):
+            values = in_expr.expressions
+            if len(values) > max_in_values:
+                remaining = len(values) - max_in_values
+                in_expr.set(
+                    "expressions",
+                    values[:max_in_values] + [exp.Var(this=f"/* {remaining} more values */")],
+                )
+        sql = tree.sql(dialect=SQL_DIALECT)
+
+    if len(sql) > max_chars:
+        sql = sql[:max_chars] + "\n-- ... (truncated)"
+    return sql
+
+
+def strip_parameter_markers(sql: str) -> str:
+    """
+    Turn :name parameter markers into plain name references.
+
+    The SQL is tokenized so colons inside string literals and comments, ::
+    casts and JSON paths are left alone. If the SQL cannot be tokenized every :name
+    match is replaced instead.
+
+    Args:
+        sql: SQL with :name parameter markers.
+
+    Returns:
+        The SQL with each marker's colon removed.
+    """
+    # Without a colon there is nothing to strip, so skip the tokenizer
+    if ":" not in sql:
+        return sql
+
+    try:
+        tokens = SQL_DIALECT.tokenize(sql)
+    except SqlglotError as e:
+        logger.debug(f"Could not tokenize SQL: {str(e).splitlines()[0]}")
+        return PARAMETER_MARKER_PATTERN.sub(r"\1", sql)
+
+    # A marker is a colon directly followed by an unquoted name. A colon glued
+    # to a preceding column or bracket is a JSON path (raw:owner), not a marker.
+    marker_positions: list[int] = []
+    for i, colon in enumerate(tokens[:-1]):
+        name = tokens[i + 1]
+        if (
+            colon.token_type != TokenType.COLON
+            or name.start != colon.end + 1
+            or sql[name.start : name.end + 1] != name.text
+            or not PARAMETER_NAME_PATTERN.fullmatch(name.text)
+        ):
+            continue
+        if i > 0:
+            previous_token = tokens[i - 1]
+            if (
+                previous_token.end + 1 == colon.start
+                and previous_token.token_type in JSON_PATH_TOKENS
+            ):
+                continue
+        marker_positions.append(colon.start)
+
+    parts: list[str] = []
+    previous = 0
+    for position in marker_positions:
+        parts.append(sql[previous:position])
+        previous = position + 1
+    parts.append(sql[previous:])
+    return "".join(parts)
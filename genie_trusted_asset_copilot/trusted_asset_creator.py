@@ -5,20 +5,31 @@ This module creates SQL example instructions (trusted assets) and
 Unity Catalog functions from complex SQL queries.
 """
 
-import json
 import re
+import threading
 import time
 import uuid
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from functools import lru_cache
 
+import orjson
 import sqlparse
 from databricks.sdk import WorkspaceClient
-from databricks.sdk.service.sql import StatementState
-from databricks_langchain import ChatDatabricks
-from langchain_core.messages import HumanMessage, SystemMessage
+from databricks.sdk.service.sql import StatementResponse, StatementState
+from langchain_core.messages import HumanMessage
 from loguru import logger
 
+from genie_trusted_asset_copilot.llm import (
+    cached_system_message,
+    get_llm,
+    get_structured_llm,
+    invoke_with_retry,
+)
+from genie_trusted_asset_copilot.llm_cache import LLMCache
 from genie_trusted_asset_copilot.models import (
+    AssetText,
+    BatchAssetText,
     CreationResult,
     ExampleQuestionSQL,
     QueryParameter,
@@ -26,6 +37,11 @@ from genie_trusted_asset_copilot.models import (
     SQLParameter,
     TrustedAssetCandidate,
 )
+from genie_trusted_asset_copilot.sql_analysis import (
+    format_sql,
+    simple_select_parts,
+    strip_parameter_markers,
+)
 
 SQL_CORRECTION_PROMPT = """You are an expert SQL developer. A CREATE FUNCTION statement failed with an error.
 Analyze the error and provide a corrected SQL statement.
@@ -68,7 +84,120 @@ Given a question and its SQL query, generate concise usage guidance that explain
 3. If parameterized, how to customize the parameters
 
 Keep the guidance to 2-4 sentences. Be specific and actionable.
-Do NOT repeat the question. Focus on practical guidance."""
+Do NOT repeat the question. Focus on practical guidance.
+
+Also write a clear, concise 1-2 sentence description of what the query does, for use as
+a SQL function comment. Focus on the business value and what data it returns.
+Do NOT include the question. Do NOT use markdown or special formatting."""
+
+FUNCTION_DESCRIPTION_PROMPT = (
+    "Generate a clear, concise 1-2 sentence description of what this SQL function does. "
+    "Focus on the business value and what data it returns. "
+    "Do NOT include the example question. "
+    "Do NOT use markdown or special formatting. "
+    "Write in plain text suitable for a function comment."
+)
+
+# Model endpoint used for guidance, descriptions, and SQL correction
+LLM_MODEL = "databricks-claude-sonnet-4"
+
+# Output token budget for one candidate's usage guidance and description
+GUIDANCE_MAX_TOKENS = 650
+
+# Upper bound on candidates per usage guidance request
+MAX_GUIDANCE_BATCH_SIZE = 8
+
+
+# Statement states that mean execution has not finished yet
+PENDING_STATEMENT_STATES = frozenset({StatementState.PENDING, StatementState.RUNNING})
+
+# Longest time execute_statement may block before returning (the API maximum)
+STATEMENT_WAIT_TIMEOUT = "50s"
+
+# Statement polling backoff: starts fast for quick statements, capped for slow ones
+STATEMENT_POLL_INITIAL_DELAY_SECONDS = 0.05
+STATEMENT_POLL_MAX_DELAY_SECONDS = 2.0
+
+# Worst-case time to create one UC function: three statement attempts (each
+# blocking up to 50s and polled up to 60s) plus two LLM SQL corrections
+FUNCTION_CREATION_TIMEOUT_SECONDS = 400
+
+# Threads submitting tag statements while functions are still being created
+TAG_WORKERS = 2
+
+# Delays between smoke test retries while UC metadata propagates
+SMOKE_TEST_RETRY_DELAYS_SECONDS = (0.5, 1.0, 2.0)
+
+# How long the space configuration last read or written may answer read-only
+# checks; updates always refetch, since the Genie API has no ETag to detect edits
+SPACE_CONFIG_CACHE_TTL_SECONDS = 60.0
+
+# Characters not allowed in generated function names (matched after lowercasing)
+INVALID_FUNCTION_NAME_CHARS_PATTERN = re.compile(r"[^a-z0-9_]")
+
+# Fenced code block in an LLM response, with an optional sql language tag
+CODE_BLOCK_PATTERN = re.compile(r"```(?:sql\b)?(.*?)```", re.DOTALL | re.IGNORECASE)
+
+# Statement errors that rewriting the SQL cannot fix
+NON_CORRECTABLE_ERROR_PATTERN = re.compile(
+    r"PERMISSION_DENIED|INSUFFICIENT_PERMISSIONS|timed out", re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=1024)
+def _format_sql_cached(sql: str) -> str:
+    """
+    Format SQL for readability, memoized on the SQL text.
+
+    The sqlglot tree is rendered when the SQL parses, which is several times
+    faster than sqlparse; sqlparse is kept for SQL that sqlglot cannot handle.
+    The same SQL is formatted again for repeated candidates and across
+    creator calls.
+
+    Args:
+        sql: The SQL query string (may be unformatted).
+
+    Returns:
+        Formatted SQL string with proper indentation and line breaks.
+    """
+    formatted = format_sql(sql)
+    if formatted is not None:
+        return formatted
+
+    return sqlparse.format(
+        sql,
+        reindent=True,
+        keyword_case="upper",
+        indent_width=2,
+    )
+
+
+@lru_cache(maxsize=4096)
+def _sanitize_function_name_cached(question: str) -> str:
+    """
+    Create a valid function name from a question, memoized on the question.
+
+    Each candidate's name is needed in several places (deduplication,
+    creation, error reporting), so it is only derived once.
+
+    Args:
+        question: The question to convert to a function name.
+
+    Returns:
+        A valid SQL function name.
+    """
+    # Take first few words and convert to snake_case
+    words = question.lower().split()[:5]
+    name = "_".join(words)
+    # Remove non-alphanumeric characters except underscores
+    name = INVALID_FUNCTION_NAME_CHARS_PATTERN.sub("", name)
+    # Ensure it doesn't start with a number
+    if name and name[0].isdigit():
+        name = "fn_" + name
+    # Limit length
+    name = name[:50]
+    # Add prefix for clarity
+    return f"genie_{name}"
 
 
 class TrustedAssetCreator:
@@ -81,6 +210,7 @@ class TrustedAssetCreator:
         schema: str,
         client: WorkspaceClient | None = None,
         warehouse_id: str | None = None,
+        cache: LLMCache | None = None,
     ) -> None:
         """
         Initialize the trusted asset creator.
@@ -91,16 +221,52 @@ class TrustedAssetCreator:
             schema: Schema name within the catalog for functions.
             client: Optional WorkspaceClient instance.
             warehouse_id: SQL warehouse ID for executing CREATE FUNCTION statements.
+            cache: Optional cache of generated guidance and descriptions, reused
+                across runs.
         """
         self.space_id = space_id
         self.catalog = catalog
         self.schema = schema
         self.client = client or WorkspaceClient()
         self.warehouse_id = warehouse_id
+        self.cache = cache
+
+        # Serialized space configuration last read or written, with its monotonic timestamp
+        self._space_config_cache: tuple[str, float] | None = None
+
+        # Function descriptions generated alongside usage guidance, by (question, SQL)
+        self._function_descriptions: dict[tuple[str, str], str] = {}
+
+        # CREATE FUNCTION statements in flight, by function name, so they can be
+        # cancelled once a create_uc_functions() run passes its deadline
+        self._running_statements: dict[str, str] = {}
+        self._running_statements_lock = threading.Lock()
+        self._creation_abandoned = threading.Event()
+
+    def _cached_space_config(self) -> dict | None:
+        """
+        Get the configuration last read or written by this creator, if still fresh.
+
+        Only for read-only checks: an update built from this copy would revert
+        edits made to the space since it was cached.
+
+        Returns:
+            The parsed serialized_space configuration, or None if there is no
+            copy younger than SPACE_CONFIG_CACHE_TTL_SECONDS.
+        """
+        if self._space_config_cache is None:
+            return None
+        serialized, cached_at = self._space_config_cache
+        if time.monotonic() - cached_at >= SPACE_CONFIG_CACHE_TTL_SECONDS:
+            return None
+        return orjson.loads(serialized)
 
     def _get_current_space_config(self) -> dict:
         """
-        Get the current Genie space configuration.
+        Get the current Genie space configuration from the Genie API.
+
+        Updates must build on this rather than a cached copy, so at most one
+        round trip separates the read from the write.
 
         Returns:
             The parsed serialized_space configuration.
@@ -123,11 +289,34 @@ class TrustedAssetCreator:
                 },
             }
 
-        return json.loads(space.serialized_space)
+        self._space_config_cache = (space.serialized_space, time.monotonic())
+        return orjson.loads(space.serialized_space)
+
+    def _update_space_config(self, config: dict) -> None:
+        """
+        Write a modified configuration back to the Genie space.
+
+        Args:
+            config: The full space configuration to store.
+        """
+        serialized = orjson.dumps(config).decode()
+        self.client.genie.update_space(
+            space_id=self.space_id,
+            serialized_space=serialized,
+        )
+        self._space_config_cache = (serialized, time.monotonic())
+
+    def _generate_unique_ids(self, count: int) -> list[str]:
+        """
+        Generate unique IDs for a batch of new entries.
+
+        Args:
+            count: Number of IDs to generate.
 
-    def _generate_unique_id(self) -> str:
-        """Generate a unique ID for a trusted asset (32-hex UUID without hyphens)."""
-        return uuid.uuid4().hex
+        Returns:
+            List of 32-hex UUIDs without hyphens.
+        """
+        return [uuid.uuid4().hex for _ in range(count)]
 
     def _format_sql(self, sql: str) -> str:
         """
@@ -139,12 +328,7 @@ class TrustedAssetCreator:
         Returns:
             Formatted SQL string with proper indentation and line breaks.
         """
-        return sqlparse.format(
-            sql,
-            reindent=True,
-            keyword_case="upper",
-            indent_width=2,
-        )
+        return _format_sql_cached(sql)
 
     def _sql_to_lines(self, sql: str) -> list[str]:
         """
@@ -163,13 +347,7 @@ class TrustedAssetCreator:
 
         lines = formatted_sql.split("\n")
         # Add newline to all but the last line
-        result = []
-        for i, line in enumerate(lines):
-            if i < len(lines) - 1:
-                result.append(line + "\n")
-            else:
-                result.append(line)
-        return result
+        return [f"{line}\n" for line in lines[:-1]] + lines[-1:]
 
     def _normalize_question(self, question: str) -> str:
         """
@@ -183,6 +361,55 @@ class TrustedAssetCreator:
         """
         return " ".join(question.lower().split())
 
+    def _text_cache_key(self, kind: str, prompt: str, question: str, sql: str, *extra: str) -> str:
+        """
+        Build the cache key for generated text.
+
+        The SQL is normalized first so that queries differing only in
+        keyword case, comments, or whitespace share an entry.
+
+        Args:
+            kind: The kind of text generated (e.g. "guidance").
+            prompt: The system prompt used to generate it.
+            question: The candidate's question.
+            sql: The SQL shown to the LLM.
+            extra: Any other prompt input that shapes the response.
+
+        Returns:
+            The cache key.
+        """
+        normalized_sql = " ".join(
+            sqlparse.format(sql, keyword_case="upper", strip_comments=True).split()
+        )
+        return LLMCache.make_key(LLM_MODEL, kind, prompt, question, normalized_sql, *extra)
+
+    def _get_cached_text(self, key: str) -> str | None:
+        """
+        Look up previously generated text.
+
+        Args:
+            key: The cache key from _text_cache_key().
+
+        Returns:
+            The cached text, or None on a miss.
+        """
+        if self.cache is None:
+            return None
+        cached = self.cache.get(key)
+        return cached.get("text") if cached is not None else None
+
+    def _set_cached_text(self, key: str, text: str) -> None:
+        """
+        Store generated text in the cache.
+
+        Args:
+            key: The cache key from _text_cache_key().
+            text: The generated text.
+        """
+        if self.cache is None:
+            return
+        self.cache.set(key, {"text": text})
+
     def _map_to_genie_type(self, sql_type: str) -> str:
         """
         Map SQL/extracted type to Genie parameter type_hint.
@@ -210,55 +437,282 @@ class TrustedAssetCreator:
         # Default to STRING
         return "STRING"
 
-    def _generate_usage_guidance(
-        self,
-        candidate: TrustedAssetCandidate,
-    ) -> str:
+    def _guidance_inputs(self, candidate: TrustedAssetCandidate) -> tuple[str, str]:
+        """
+        Get the SQL and parameter details shown to the LLM for usage guidance.
+
+        Args:
+            candidate: The candidate with question, SQL, and parameters.
+
+        Returns:
+            Tuple of (SQL to show, parameter info suffix or empty string).
+        """
+        # Build parameter info if available
+        param_info = ""
+        if candidate.parameters:
+            param_list = ", ".join(
+                f"{p.name} ({p.sql_type}): {p.description}"
+                for p in candidate.parameters
+            )
+            param_info = f"\n\nParameters: {param_list}"
+
+        return candidate.parameterized_sql or candidate.sql, param_info
+
+    def _guidance_request(self, candidate: TrustedAssetCandidate) -> str:
+        """
+        Build the usage guidance request text for a candidate.
+
+        Args:
+            candidate: The candidate with question, SQL, and parameters.
+
+        Returns:
+            The question, SQL, and parameter details to send to the LLM.
+        """
+        sql_to_show, param_info = self._guidance_inputs(candidate)
+        return f"Question: {candidate.question}\n\nSQL:\n```sql\n{sql_to_show}\n```{param_info}"
+
+    def _guidance_cache_key(self, candidate: TrustedAssetCandidate) -> str:
+        """
+        Build the cache key for a candidate's usage guidance.
+
+        Args:
+            candidate: The candidate with question, SQL, and parameters.
+
+        Returns:
+            The cache key.
+        """
+        sql_to_show, param_info = self._guidance_inputs(candidate)
+        return self._text_cache_key(
+            "guidance", USAGE_GUIDANCE_PROMPT, candidate.question, sql_to_show, param_info
+        )
+
+    def _asset_text_cache_key(self, candidate: TrustedAssetCandidate) -> str:
+        """
+        Build the cache key for the function description generated with usage guidance.
+
+        Args:
+            candidate: The candidate with question, SQL, and parameters.
+
+        Returns:
+            The cache key.
+        """
+        sql_to_show, param_info = self._guidance_inputs(candidate)
+        return self._text_cache_key(
+            "asset_text", USAGE_GUIDANCE_PROMPT, candidate.question, sql_to_show, param_info
+        )
+
+    def _description_cache_key(self, candidate: TrustedAssetCandidate) -> str:
+        """
+        Build the cache key for a candidate's function description.
+
+        Args:
+            candidate: The candidate with question and SQL.
+
+        Returns:
+            The cache key.
+        """
+        return self._text_cache_key(
+            "description", FUNCTION_DESCRIPTION_PROMPT, candidate.question, candidate.sql[:500]
+        )
+
+    def _store_asset_text(self, candidate: TrustedAssetCandidate, text: AssetText) -> AssetText:
+        """
+        Clean up generated text and cache it for reuse.
+
+        The description comes from the usage guidance prompt, so it is cached
+        under its own key rather than the one _generate_function_description()
+        uses for its prompt.
+
+        Args:
+            candidate: The candidate the text was generated for.
+            text: The generated usage guidance and description.
+
+        Returns:
+            The cleaned text.
+        """
+        text = AssetText(
+            usage_guidance=text.usage_guidance.strip(),
+            description=text.description.strip().strip('"\''),
+        )
+        self._set_cached_text(self._guidance_cache_key(candidate), text.usage_guidance)
+        if text.description:
+            self._set_cached_text(self._asset_text_cache_key(candidate), text.description)
+        return text
+
+    def _template_asset_text(self, candidate: TrustedAssetCandidate) -> AssetText | None:
         """
-        Generate usage guidance for a trusted asset using ChatDatabricks.
+        Build usage guidance and a description without the LLM for a trivial query.
+
+        A plain single-table SELECT is fully described by its table, columns,
+        filters, ordering, limit, and parameters, so a template is faster and
+        more consistent than a generated text.
 
         Args:
             candidate: The candidate with question, SQL, and parameters.
 
         Returns:
-            Generated usage guidance text.
+            The templated text, or None if the query is not a plain single-table SELECT.
+        """
+        sql_to_show, _ = self._guidance_inputs(candidate)
+        select = simple_select_parts(sql_to_show)
+        if select is None:
+            return None
+
+        columns = select.columns
+        if "*" in columns:
+            returned = "all columns"
+        elif len(columns) > 5:
+            returned = f"{', '.join(columns[:5])} and {len(columns) - 5} more columns"
+        else:
+            returned = ", ".join(columns)
+        if select.distinct:
+            returned = f"distinct {returned}"
+
+        description = f"Returns {returned} from {select.table}"
+        if select.filters:
+            description += f" where {' and '.join(select.filters)}"
+        if select.order_by:
+            description += f", ordered by {', '.join(select.order_by)}"
+        if select.limit is not None:
+            description += f", limited to {select.limit} rows"
+        description += "."
+
+        usage_guidance = description
+        if candidate.parameters:
+            param_names = ", ".join(p.name for p in candidate.parameters)
+            usage_guidance += f" Customize the results with the parameters: {param_names}."
+        return AssetText(usage_guidance=usage_guidance, description=description)
+
+    def _generate_usage_guidance_batch(
+        self,
+        candidates: list[TrustedAssetCandidate],
+    ) -> list[AssetText] | None:
+        """
+        Generate usage guidance and descriptions for several candidates with a single LLM call.
+
+        Sending a batch amortizes the system prompt and the request round
+        trip across all candidates in it.
+
+        Args:
+            candidates: The candidates (at most MAX_GUIDANCE_BATCH_SIZE).
+
+        Returns:
+            One result per candidate in input order, or None if the call
+            failed or returned a different number of results.
         """
+        query_blocks = "\n\n".join(
+            f"Query {i}:\n{self._guidance_request(candidate)}"
+            for i, candidate in enumerate(candidates, start=1)
+        )
+        messages = [
+            cached_system_message(USAGE_GUIDANCE_PROMPT, LLM_MODEL),
+            HumanMessage(
+                content=f"Write usage guidance and a description for each of the following "
+                f"{len(candidates)} queries independently. Return exactly {len(candidates)} "
+                f"results, in the same order as the queries.\n\n{query_blocks}"
+            ),
+        ]
+
         try:
-            llm = ChatDatabricks(
-                model="databricks-claude-sonnet-4",
-                temperature=0.0,
-                max_tokens=500,
+            llm = get_structured_llm(
+                LLM_MODEL,
+                0.0,
+                GUIDANCE_MAX_TOKENS * MAX_GUIDANCE_BATCH_SIZE,
+                BatchAssetText,
             )
+            result = invoke_with_retry(llm, messages)
+
+            if isinstance(result, dict):
+                result = BatchAssetText(**result)
+
+            if not isinstance(result, BatchAssetText):
+                logger.warning("Unexpected result type from batch usage guidance LLM")
+                return None
 
-            # Build parameter info if available
-            param_info = ""
-            if candidate.parameters:
-                param_list = ", ".join(
-                    f"{p.name} ({p.sql_type}): {p.description}"
-                    for p in candidate.parameters
+            if len(result.results) != len(candidates):
+                logger.warning(
+                    f"Batch usage guidance returned {len(result.results)} results "
+                    f"for {len(candidates)} candidates, generating individually"
                 )
-                param_info = f"\n\nParameters: {param_list}"
+                return None
+
+            return [
+                self._store_asset_text(candidate, text)
+                for candidate, text in zip(candidates, result.results)
+            ]
+
+        except Exception as e:
+            logger.warning(f"Batch usage guidance failed, generating individually: {e}")
+            return None
+
+    def _generate_guidance_for_batch(
+        self,
+        candidates: list[TrustedAssetCandidate],
+    ) -> list[tuple[TrustedAssetCandidate, AssetText]]:
+        """
+        Generate usage guidance and descriptions for a batch of candidates (thread-safe worker function).
+
+        Falls back to one request per candidate if the batch request fails.
+
+        Args:
+            candidates: The candidates to generate guidance for.
+
+        Returns:
+            List of (candidate, generated text) pairs.
+        """
+        texts = None
+        if len(candidates) > 1:
+            texts = self._generate_usage_guidance_batch(candidates)
+        if texts is None:
+            texts = [self._generate_usage_guidance(candidate) for candidate in candidates]
+        return list(zip(candidates, texts))
+
+    def _generate_usage_guidance(
+        self,
+        candidate: TrustedAssetCandidate,
+    ) -> AssetText:
+        """
+        Generate usage guidance and a function description for a trusted asset using the LLM.
+
+        Args:
+            candidate: The candidate with question, SQL, and parameters.
+
+        Returns:
+            Generated usage guidance and description. The description is empty
+            if the guidance came from the cache or generation failed.
+        """
+        cached = self._get_cached_text(self._guidance_cache_key(candidate))
+        if cached is not None:
+            logger.debug(f"Using cached usage guidance: {cached[:100]}...")
+            return AssetText(usage_guidance=cached, description="")
 
-            sql_to_show = candidate.parameterized_sql or candidate.sql
+        try:
+            llm = get_structured_llm(LLM_MODEL, 0.0, GUIDANCE_MAX_TOKENS, AssetText)
 
             messages = [
-                SystemMessage(content=USAGE_GUIDANCE_PROMPT),
-                HumanMessage(
-                    content=f"Question: {candidate.question}\n\n"
-                    f"SQL:\n```sql\n{sql_to_show}\n```{param_info}"
-                ),
+                cached_system_message(USAGE_GUIDANCE_PROMPT, LLM_MODEL),
+                HumanMessage(content=self._guidance_request(candidate)),
             ]
 
-            response = llm.invoke(messages)
-            guidance = response.content.strip()
+            result = invoke_with_retry(llm, messages)
 
-            logger.debug(f"Generated usage guidance: {guidance[:100]}...")
-            return guidance
+            if isinstance(result, dict):
+                result = AssetText(**result)
+
+            if not isinstance(result, AssetText):
+                raise ValueError(f"Unexpected result type: {type(result).__name__}")
+
+            text = self._store_asset_text(candidate, result)
+            logger.debug(f"Generated usage guidance: {text.usage_guidance[:100]}...")
+            return text
 
         except Exception as e:
             logger.warning(f"Failed to generate usage guidance: {e}")
             # Return a simple fallback
-            return f"Use this query to answer: {candidate.question[:100]}"
+            return AssetText(
+                usage_guidance=f"Use this query to answer: {candidate.question[:100]}",
+                description="",
+            )
 
     def create_trusted_assets(
         self,
@@ -298,10 +752,12 @@ class TrustedAssetCreator:
             existing_examples = config["instructions"]["example_question_sqls"]
 
             # Build a map of normalized questions to their indices for replacement
-            existing_question_map: dict[str, int] = {}
-            for i, ex in enumerate(existing_examples):
-                normalized_q = self._normalize_question("".join(ex.get("question", [])))
-                existing_question_map[normalized_q] = i
+            normalize_question = self._normalize_question
+            join = "".join
+            existing_question_map: dict[str, int] = {
+                normalize_question(join(ex.get("question", ()))): i
+                for i, ex in enumerate(existing_examples)
+            }
 
             if existing_question_map:
                 logger.info(
@@ -314,7 +770,7 @@ class TrustedAssetCreator:
             indices_to_remove: list[int] = []
 
             for candidate in candidates:
-                normalized = self._normalize_question(candidate.question)
+                normalized = normalize_question(candidate.question)
 
                 # Check if already exists in the Genie space
                 if normalized in existing_question_map:
@@ -351,38 +807,73 @@ class TrustedAssetCreator:
                 logger.info("No new trusted assets to add after filtering")
                 return results
 
-            # Generate all usage guidance concurrently
-            logger.info(
-                f"Generating usage guidance for {len(candidates_to_process)} candidates using {num_workers} workers"
-            )
+            # Template guidance for trivial queries and reuse cached guidance,
+            # then generate the rest in concurrent batches
             guidance_map: dict[str, str] = {}
+            candidates_to_generate: list[TrustedAssetCandidate] = []
+            templated_count = 0
+            cached_count = 0
+            for candidate in candidates_to_process:
+                template = self._template_asset_text(candidate)
+                if template is not None:
+                    guidance_map[candidate.question] = template.usage_guidance
+                    self._function_descriptions[(candidate.question, candidate.sql)] = (
+                        template.description
+                    )
+                    templated_count += 1
+                    continue
+
+                cached = self._get_cached_text(self._guidance_cache_key(candidate))
+                if cached is not None:
+                    guidance_map[candidate.question] = cached
+                    cached_count += 1
+                else:
+                    candidates_to_generate.append(candidate)
+
+            if templated_count:
+                logger.info(f"Using template usage guidance for {templated_count} simple queries")
+            if cached_count:
+                logger.info(f"Reusing cached usage guidance for {cached_count} candidates")
+
+            batches = [
+                candidates_to_generate[i : i + MAX_GUIDANCE_BATCH_SIZE]
+                for i in range(0, len(candidates_to_generate), MAX_GUIDANCE_BATCH_SIZE)
+            ]
+            if batches:
+                logger.info(
+                    f"Generating usage guidance for {len(candidates_to_generate)} candidates "
+                    f"in {len(batches)} requests using {num_workers} workers"
+                )
 
             with ThreadPoolExecutor(max_workers=num_workers) as executor:
-                future_to_candidate = {
-                    executor.submit(self._generate_usage_guidance, candidate): candidate
-                    for candidate in candidates_to_process
+                future_to_batch = {
+                    executor.submit(self._generate_guidance_for_batch, batch): batch
+                    for batch in batches
                 }
-                
-                logger.info(f"Thread pool started: {len(future_to_candidate)} tasks submitted with {num_workers} max worker threads")
 
-                for future in as_completed(future_to_candidate):
-                    candidate = future_to_candidate[future]
+                for future in as_completed(future_to_batch):
                     try:
-                        guidance = future.result()
-                        guidance_map[candidate.question] = guidance
+                        for candidate, text in future.result():
+                            guidance_map[candidate.question] = text.usage_guidance
+                            if text.description:
+                                self._function_descriptions[
+                                    (candidate.question, candidate.sql)
+                                ] = text.description
                     except Exception as e:
-                        logger.warning(
-                            f"Failed to generate usage guidance for '{candidate.question[:50]}': {e}"
-                        )
-                        # Use fallback guidance
-                        guidance_map[candidate.question] = (
-                            f"Use this query to answer: {candidate.question[:100]}"
-                        )
+                        for candidate in future_to_batch[future]:
+                            logger.warning(
+                                f"Failed to generate usage guidance for '{candidate.question[:50]}': {e}"
+                            )
+                            # Use fallback guidance
+                            guidance_map[candidate.question] = (
+                                f"Use this query to answer: {candidate.question[:100]}"
+                            )
 
             # Build new examples using pre-generated guidance
             new_examples: list[dict] = []
+            example_ids = self._generate_unique_ids(len(candidates_to_process))
 
-            for candidate in candidates_to_process:
+            for example_id, candidate in zip(example_ids, candidates_to_process):
                 # Use parameterized SQL if available, otherwise use original
                 sql_to_use = candidate.parameterized_sql or candidate.sql
 
@@ -402,8 +893,9 @@ class TrustedAssetCreator:
                         for p in candidate.parameters
                     ]
 
-                example = ExampleQuestionSQL(
-                    id=self._generate_unique_id(),
+                # Every field is built here from validated candidates, so skip validation
+                example = ExampleQuestionSQL.model_construct(
+                    id=example_id,
                     question=[candidate.question],
                     sql=self._sql_to_lines(sql_to_use),
                     usage_guidance=[usage_guidance],
@@ -411,8 +903,6 @@ class TrustedAssetCreator:
                 )
 
                 new_examples.append(example.model_dump())
-                # Track this as processed to avoid duplicates
-                existing_question_map[normalized] = -1  # Mark as processed
 
                 logger.info(f"Adding trusted asset: {candidate.question[:50]}...")
                 results.append(
@@ -435,29 +925,26 @@ class TrustedAssetCreator:
                     )
                 return results
 
-            # Remove old entries that are being replaced (in reverse order to preserve indices)
-            if indices_to_remove:
-                for idx in sorted(indices_to_remove, reverse=True):
-                    del config["instructions"]["example_question_sqls"][idx]
-                logger.info(f"Removed {len(indices_to_remove)} existing trusted assets for replacement")
-
-            # Update the configuration with new examples
-            config["instructions"]["example_question_sqls"].extend(new_examples)
+            # Rebuild the list in one pass, dropping old entries that are being replaced
+            removed = set(indices_to_remove)
+            merged = [ex for i, ex in enumerate(existing_examples) if i not in removed]
+            if removed:
+                logger.info(f"Removed {len(removed)} existing trusted assets for replacement")
+            merged.extend(new_examples)
 
             # Sort by id (required by Genie API)
-            config["instructions"]["example_question_sqls"].sort(key=lambda x: x.get("id", ""))
+            merged.sort(key=lambda x: x.get("id", ""))
+            config["instructions"]["example_question_sqls"] = merged
 
             # Update the space
-            serialized = json.dumps(config)
-            self.client.genie.update_space(
-                space_id=self.space_id,
-                serialized_space=serialized,
-            )
+            self._update_space_config(config)
 
             logger.success(f"Added {len(new_examples)} trusted assets to Genie space")
 
         except Exception as e:
             logger.error(f"Failed to create trusted assets: {e}")
+            # The space may have changed underneath us, don't answer checks from the cache
+            self._space_config_cache = None
             results.append(
                 CreationResult(
                     success=False,
@@ -479,18 +966,7 @@ class TrustedAssetCreator:
         Returns:
             A valid SQL function name.
         """
-        # Take first few words and convert to snake_case
-        words = question.lower().split()[:5]
-        name = "_".join(words)
-        # Remove non-alphanumeric characters except underscores
-        name = re.sub(r"[^a-z0-9_]", "", name)
-        # Ensure it doesn't start with a number
-        if name and name[0].isdigit():
-            name = "fn_" + name
-        # Limit length
-        name = name[:50]
-        # Add prefix for clarity
-        return f"genie_{name}"
+        return _sanitize_function_name_cached(question)
 
     def _generate_function_description(
         self,
@@ -505,32 +981,28 @@ class TrustedAssetCreator:
         Returns:
             A clear description of what the function does.
         """
+        cache_key = self._description_cache_key(candidate)
+        cached = self._get_cached_text(cache_key)
+        if cached is not None:
+            return cached
+
         try:
-            llm = ChatDatabricks(
-                endpoint="databricks-claude-sonnet-4",
-                temperature=0.3,
-                max_tokens=150,
-            )
+            llm = get_llm(LLM_MODEL, 0.3, 150)
 
             messages = [
-                SystemMessage(
-                    content="Generate a clear, concise 1-2 sentence description of what this SQL function does. "
-                    "Focus on the business value and what data it returns. "
-                    "Do NOT include the example question. "
-                    "Do NOT use markdown or special formatting. "
-                    "Write in plain text suitable for a function comment."
-                ),
+                cached_system_message(FUNCTION_DESCRIPTION_PROMPT, LLM_MODEL),
                 HumanMessage(
                     content=f"Question: {candidate.question}\n\nSQL:\n{candidate.sql[:500]}"
                 ),
             ]
 
-            response = llm.invoke(messages)
+            response = invoke_with_retry(llm, messages)
             description = response.content.strip()
 
             # Clean up any markdown or quotes
             description = description.strip('"\'')
 
+            self._set_cached_text(cache_key, description)
             return description
 
         except Exception as e:
@@ -551,8 +1023,16 @@ class TrustedAssetCreator:
         Returns:
             A markdown-formatted description string for the SQL function.
         """
-        # Generate an overall description
-        description = self._generate_function_description(candidate)
+        # Reuse the description generated with the usage guidance, if there is one
+        description = self._function_descriptions.get(
+            (candidate.question, candidate.sql)
+        ) or self._get_cached_text(self._asset_text_cache_key(candidate))
+        if description is None:
+            template = self._template_asset_text(candidate)
+            if template is not None:
+                description = template.description
+            else:
+                description = self._generate_function_description(candidate)
 
         # Prepare the example question
         question = candidate.question
@@ -591,7 +1071,7 @@ class TrustedAssetCreator:
         """
         # Unity Catalog SQL functions use the parameter name directly
         # Replace :param_name with param_name
-        return re.sub(r':(\w+)', r'\1', parameterized_sql)
+        return strip_parameter_markers(parameterized_sql)
 
     def _build_param_definition(self, param: SQLParameter) -> str:
         """
@@ -616,17 +1096,20 @@ class TrustedAssetCreator:
     def _generate_function_sql(
         self,
         candidate: TrustedAssetCandidate,
+        func_name: str | None = None,
     ) -> tuple[str, str]:
         """
         Generate a CREATE FUNCTION statement for a complex query.
 
         Args:
             candidate: The candidate query to convert to a function.
+            func_name: The candidate's sanitized function name, if already known.
 
         Returns:
             Tuple of (function_name, CREATE FUNCTION SQL statement).
         """
-        func_name = self._sanitize_function_name(candidate.question)
+        if func_name is None:
+            func_name = self._sanitize_function_name(candidate.question)
         full_name = f"{self.catalog}.{self.schema}.{func_name}"
         parameters = candidate.parameters
 
@@ -708,14 +1191,10 @@ RETURN {sql_body}"""
             Corrected SQL statement, or None if correction failed.
         """
         try:
-            llm = ChatDatabricks(
-                model="databricks-claude-sonnet-4",
-                temperature=0.0,
-                max_tokens=2000,
-            )
+            llm = get_llm(LLM_MODEL, 0.0, 2000)
 
             messages = [
-                SystemMessage(content=SQL_CORRECTION_PROMPT),
+                cached_system_message(SQL_CORRECTION_PROMPT, LLM_MODEL),
                 HumanMessage(
                     content=f"Original SQL that failed:\n```sql\n{original_sql}\n```\n\n"
                     f"Error message:\n{error_message}\n\n"
@@ -723,20 +1202,13 @@ RETURN {sql_body}"""
                 ),
             ]
 
-            response = llm.invoke(messages)
+            response = invoke_with_retry(llm, messages)
             corrected_sql = response.content.strip()
 
             # Extract SQL from code block if present
-            if "```sql" in corrected_sql:
-                start = corrected_sql.find("```sql") + 6
-                end = corrected_sql.find("```", start)
-                if end > start:
-                    corrected_sql = corrected_sql[start:end].strip()
-            elif "```" in corrected_sql:
-                start = corrected_sql.find("```") + 3
-                end = corrected_sql.find("```", start)
-                if end > start:
-                    corrected_sql = corrected_sql[start:end].strip()
+            match = CODE_BLOCK_PATTERN.search(corrected_sql)
+            if match and match.group(1).strip():
+                corrected_sql = match.group(1).strip()
 
             logger.info("LLM suggested a corrected SQL statement")
             return corrected_sql
@@ -749,6 +1221,7 @@ RETURN {sql_body}"""
         self,
         candidate: TrustedAssetCandidate,
         max_retries: int = 2,
+        func_name: str | None = None,
     ) -> CreationResult:
         """
         Attempt to create a UC function with retry and error correction.
@@ -756,16 +1229,21 @@ RETURN {sql_body}"""
         Args:
             candidate: The candidate to create a function for.
             max_retries: Maximum number of retry attempts.
+            func_name: The candidate's sanitized function name, if already known.
 
         Returns:
             CreationResult indicating success or failure.
         """
-        func_name, create_sql = self._generate_function_sql(candidate)
+        func_name, create_sql = self._generate_function_sql(candidate, func_name)
         full_function_name = f"{self.catalog}.{self.schema}.{func_name}"
         current_sql = create_sql
         last_error: str | None = None
 
         for attempt in range(max_retries + 1):
+            if self._creation_abandoned.is_set():
+                last_error = "Abandoned after the creation deadline passed"
+                break
+
             try:
                 if attempt > 0:
                     logger.info(f"Retry attempt {attempt}/{max_retries} for {func_name}")
@@ -775,20 +1253,25 @@ RETURN {sql_body}"""
                     statement=current_sql,
                     catalog=self.catalog,
                     schema=self.schema,
-                    wait_timeout="30s",
+                    wait_timeout=STATEMENT_WAIT_TIMEOUT,
                 )
 
-                # Poll for completion if still running
-                max_poll_attempts = 30  # 30 * 2s = 60s max polling time
-                poll_attempts = 0
-                while response.status.state in [StatementState.PENDING, StatementState.RUNNING]:
-                    if poll_attempts >= max_poll_attempts:
-                        raise Exception(f"Statement execution timed out after {max_poll_attempts * 2}s")
-                    
-                    time.sleep(2)
-                    poll_attempts += 1
-                    response = self.client.statement_execution.get_statement(response.statement_id)
-                    logger.debug(f"Polling statement {response.statement_id}, state: {response.status.state}, attempt: {poll_attempts}")
+                # Poll for completion if still running, cancellable once the run is abandoned
+                max_poll_seconds = 60
+                with self._running_statements_lock:
+                    self._running_statements[func_name] = response.statement_id
+                try:
+                    if (
+                        self._creation_abandoned.is_set()
+                        and response.status.state in PENDING_STATEMENT_STATES
+                    ):
+                        self._cancel_statement(response.statement_id)
+                    response = self._wait_for_statement(response, max_poll_seconds)
+                finally:
+                    with self._running_statements_lock:
+                        self._running_statements.pop(func_name, None)
+                if response.status.state in PENDING_STATEMENT_STATES:
+                    raise Exception(f"Statement execution timed out after {max_poll_seconds}s")
 
                 # Check if statement execution succeeded
                 if response.status.state != StatementState.SUCCEEDED:
@@ -807,34 +1290,26 @@ RETURN {sql_body}"""
 
                 logger.success(f"Created UC function: {func_name}")
 
-                # Set tags to indicate auto-generation
-                self._set_function_tags(full_function_name)
-
-                # Function was created successfully
-                creation_result = CreationResult(
+                # Function was created successfully; create_uc_functions() can smoke
+                # test all created functions together afterwards
+                return CreationResult(
                     success=True,
                     asset_type="uc_function",
                     name=func_name,
                 )
 
-                # Wait for UC metadata propagation before smoke test
-                logger.debug(f"Waiting for UC metadata propagation for {func_name}")
-                time.sleep(1)
-
-                # Smoke test is informational only - doesn't affect success
-                test_passed, test_error = self._test_function(full_function_name)
-                if not test_passed:
-                    logger.warning(f"Smoke test failed for {func_name}: {test_error}")
-                    logger.info(f"Function {func_name} was created but may need manual verification")
-                else:
-                    logger.success(f"Smoke test passed for {func_name}")
-
-                return creation_result
-
             except Exception as e:
                 last_error = str(e)
                 logger.warning(f"Function creation failed (attempt {attempt + 1}): {e}")
 
+                if self._creation_abandoned.is_set():
+                    break
+
+                # Permission problems and timeouts fail the same way whatever the SQL
+                if NON_CORRECTABLE_ERROR_PATTERN.search(last_error):
+                    logger.info("Error is not caused by the SQL, skipping correction")
+                    break
+
                 # Try to correct the SQL if we have retries left
                 if attempt < max_retries:
                     corrected_sql = self._attempt_sql_correction(current_sql, last_error)
@@ -847,10 +1322,8 @@ RETURN {sql_body}"""
                             "Falling back to non-parameterized function"
                         )
                         # Generate function without parameters
-                        func_name_simple = self._sanitize_function_name(candidate.question)
-                        full_name_simple = f"{self.catalog}.{self.schema}.{func_name_simple}"
                         comment = self._build_function_comment(candidate)
-                        current_sql = f"""CREATE OR REPLACE FUNCTION {full_name_simple}()
+                        current_sql = f"""CREATE OR REPLACE FUNCTION {full_function_name}()
 RETURNS TABLE
 LANGUAGE SQL
 COMMENT '{comment}'
@@ -867,10 +1340,62 @@ RETURN ({candidate.sql})"""
             error=f"Failed after {max_retries + 1} attempts: {last_error}",
         )
 
+    def _cancel_statement(self, statement_id: str) -> None:
+        """
+        Ask the warehouse to cancel a statement, logging rather than raising on failure.
+
+        Args:
+            statement_id: The statement to cancel.
+        """
+        try:
+            self.client.statement_execution.cancel_execution(statement_id)
+            logger.info(f"Cancelled statement {statement_id}")
+        except Exception as e:
+            logger.warning(f"Failed to cancel statement {statement_id}: {e}")
+
+    def _wait_for_statement(
+        self,
+        response: StatementResponse,
+        timeout_seconds: float,
+    ) -> StatementResponse:
+        """
+        Poll a statement until it finishes or the timeout passes.
+
+        The delay between polls starts short and grows exponentially, so
+        statements that finish quickly are seen quickly while slow ones are
+        not polled more than every STATEMENT_POLL_MAX_DELAY_SECONDS.
+
+        Args:
+            response: The response from execute_statement.
+            timeout_seconds: Maximum time to keep polling.
+
+        Returns:
+            The latest statement response, still pending if the timeout passed.
+        """
+        delay = STATEMENT_POLL_INITIAL_DELAY_SECONDS
+        deadline = time.monotonic() + timeout_seconds
+        poll_attempts = 0
+        while response.status.state in PENDING_STATEMENT_STATES:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, STATEMENT_POLL_MAX_DELAY_SECONDS)
+            poll_attempts += 1
+            response = self.client.statement_execution.get_statement(response.statement_id)
+            logger.debug(
+                f"Polling statement {response.statement_id}, state: {response.status.state}, "
+                f"attempt: {poll_attempts}"
+            )
+        return response
+
     def _set_function_tags(self, function_name: str) -> None:
         """
         Set tags on a UC function to indicate it was auto-generated.
 
+        The statement is submitted without waiting for it to finish, so the
+        tags do not add a second blocking warehouse round trip per function.
+
         Args:
             function_name: The full function name (catalog.schema.function).
         """
@@ -884,67 +1409,107 @@ RETURN ({candidate.sql})"""
                 )
             """
 
-            self.client.statement_execution.execute_statement(
+            # A zero wait timeout returns as soon as the statement is accepted
+            response = self.client.statement_execution.execute_statement(
                 warehouse_id=self.warehouse_id,
                 statement=tag_sql,
                 catalog=self.catalog,
                 schema=self.schema,
-                wait_timeout="30s",
+                wait_timeout="0s",
             )
 
-            logger.debug(f"Set tags on function: {function_name}")
+            logger.debug(
+                f"Submitted tags for function {function_name} (statement {response.statement_id})"
+            )
 
         except Exception as e:
             # Tags are non-critical, just log a warning
             logger.warning(f"Failed to set tags on function {function_name}: {e}")
 
-    def _test_function(self, function_name: str) -> tuple[bool, str | None]:
+    def _find_existing_functions(self, function_names: list[str]) -> set[str]:
         """
-        Simple smoke test: verify function exists in UC catalog.
+        Look up which functions exist in this creator's schema with one query.
 
         Args:
-            function_name: The full function name (catalog.schema.function).
+            function_names: Unqualified function names (sanitized, so safe to inline).
 
         Returns:
-            Tuple of (success: bool, error_message: str | None).
+            The names found in the catalog's information_schema.
+
+        Raises:
+            Exception: If the query fails or times out.
         """
-        try:
-            logger.info(f"Running smoke test for: {function_name}")
-            
-            # Simple existence check via DESCRIBE
-            test_sql = f"DESCRIBE FUNCTION {function_name}"
-            
-            response = self.client.statement_execution.execute_statement(
-                warehouse_id=self.warehouse_id,
-                statement=test_sql,
-                catalog=self.catalog,
-                schema=self.schema,
-                wait_timeout="30s",
-            )
-            
-            # Poll for completion if still running
-            max_poll_attempts = 10  # 10 * 1s = 10s max for smoke test
-            poll_attempts = 0
-            while response.status.state in [StatementState.PENDING, StatementState.RUNNING]:
-                if poll_attempts >= max_poll_attempts:
-                    return False, f"Smoke test timed out after {max_poll_attempts}s"
-                
-                time.sleep(1)
-                poll_attempts += 1
-                response = self.client.statement_execution.get_statement(response.statement_id)
-            
-            if response.status.state == StatementState.SUCCEEDED:
-                logger.success(f"Smoke test passed: {function_name} exists in catalog")
-                return True, None
-            else:
-                error_msg = f"DESCRIBE failed with state: {response.status.state}"
-                if response.status.error and hasattr(response.status.error, 'message'):
-                    error_msg += f" - {response.status.error.message}"
-                return False, error_msg
-                
-        except Exception as e:
-            logger.warning(f"Smoke test failed: {e}")
-            return False, str(e)
+        names_sql = ", ".join(f"'{name}'" for name in function_names)
+        schema_sql = self.schema.lower().replace("'", "''")
+        test_sql = f"""
+            SELECT routine_name
+            FROM {self.catalog}.information_schema.routines
+            WHERE routine_schema = '{schema_sql}'
+              AND routine_name IN ({names_sql})
+        """
+
+        response = self.client.statement_execution.execute_statement(
+            warehouse_id=self.warehouse_id,
+            statement=test_sql,
+            catalog=self.catalog,
+            schema=self.schema,
+            wait_timeout=STATEMENT_WAIT_TIMEOUT,
+        )
+
+        # Poll for completion if still running
+        max_poll_seconds = 10
+        response = self._wait_for_statement(response, max_poll_seconds)
+        if response.status.state in PENDING_STATEMENT_STATES:
+            raise Exception(f"Smoke test timed out after {max_poll_seconds}s")
+
+        if response.status.state != StatementState.SUCCEEDED:
+            error_msg = f"Lookup failed with state: {response.status.state}"
+            if response.status.error and hasattr(response.status.error, 'message'):
+                error_msg += f" - {response.status.error.message}"
+            raise Exception(error_msg)
+
+        rows = response.result.data_array if response.result else None
+        return {row[0] for row in rows or []}
+
+    def _test_functions(self, function_names: list[str]) -> dict[str, tuple[bool, str | None]]:
+        """
+        Simple smoke test: verify functions exist in UC catalog.
+
+        All functions are checked with a single information_schema query. UC
+        metadata can lag creation briefly, so functions not found yet are
+        checked again after each of SMOKE_TEST_RETRY_DELAYS_SECONDS.
+
+        Args:
+            function_names: Unqualified names of functions in this creator's schema.
+
+        Returns:
+            Dict mapping each function name to (success: bool, error_message: str | None).
+        """
+        statuses: dict[str, tuple[bool, str | None]] = {
+            name: (False, "Function not found in catalog") for name in function_names
+        }
+        pending = set(function_names)
+
+        for delay in (0.0, *SMOKE_TEST_RETRY_DELAYS_SECONDS):
+            if not pending:
+                break
+            if delay:
+                logger.debug(f"Waiting for UC metadata propagation for {len(pending)} functions")
+                time.sleep(delay)
+
+            try:
+                found = self._find_existing_functions(sorted(pending))
+            except Exception as e:
+                logger.warning(f"Smoke test failed: {e}")
+                for name in pending:
+                    statuses[name] = (False, str(e))
+                break
+
+            for name in found & pending:
+                statuses[name] = (True, None)
+            pending -= found
+
+        return statuses
 
     def create_uc_functions(
         self,
@@ -952,6 +1517,7 @@ RETURN ({candidate.sql})"""
         dry_run: bool = False,
         force: bool = False,  # noqa: ARG002 - UC functions use CREATE OR REPLACE
         num_workers: int = 4,
+        verify_creation: bool = False,
     ) -> list[CreationResult]:
         """
         Create Unity Catalog functions from complex queries.
@@ -965,6 +1531,9 @@ RETURN ({candidate.sql})"""
             dry_run: If True, preview changes without applying them.
             force: Accepted for API consistency (UC functions always replace).
             num_workers: Number of concurrent worker threads (default: 4).
+            verify_creation: Smoke test that the created functions are listed in
+                the catalog. A CREATE that succeeded already guarantees the
+                function exists, so this only waits for metadata propagation.
 
         Returns:
             List of CreationResult objects indicating success/failure.
@@ -984,30 +1553,34 @@ RETURN ({candidate.sql})"""
                 )
             ]
 
-        # Filter out duplicate function names
-        seen_names: set[str] = set()
-        unique_candidates: list[TrustedAssetCandidate] = []
-
+        # Filter out duplicate function names (first candidate wins), keeping each
+        # candidate's name so later steps don't derive it again
+        candidates_by_name: dict[str, TrustedAssetCandidate] = {}
         for candidate in candidates:
             func_name = self._sanitize_function_name(candidate.question)
-            if func_name not in seen_names:
-                seen_names.add(func_name)
-                unique_candidates.append(candidate)
-            else:
+            if candidates_by_name.setdefault(func_name, candidate) is not candidate:
                 logger.debug(f"Skipping duplicate function name: {func_name}")
+        unique_candidates = list(candidates_by_name.items())
 
         if dry_run:
             results: list[CreationResult] = []
-            for candidate in unique_candidates:
-                func_name = self._sanitize_function_name(candidate.question)
-                _, create_sql = self._generate_function_sql(candidate)
+            # Generating the SQL calls the LLM for each description, so run those concurrently
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                generated = list(
+                    executor.map(
+                        lambda named: self._generate_function_sql(named[1], named[0]),
+                        unique_candidates,
+                    )
+                )
+            for (_, candidate), (func_name, create_sql) in zip(unique_candidates, generated):
                 params_info = (
                     f" with {len(candidate.parameters)} parameters"
                     if candidate.parameters
                     else ""
                 )
                 logger.info(f"[DRY RUN] Would create UC function: {func_name}{params_info}")
-                logger.debug(f"SQL:\n{create_sql}")
+                # Formatted by loguru only when DEBUG is enabled
+                logger.debug("SQL:\n{}", create_sql)
                 results.append(
                     CreationResult(
                         success=True,
@@ -1023,36 +1596,141 @@ RETURN ({candidate.sql})"""
         )
         results: list[CreationResult] = []
 
-        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        # Bound the whole batch so a hung statement cannot hold it indefinitely
+        rounds = -(-len(unique_candidates) // num_workers)
+        timeout_seconds = FUNCTION_CREATION_TIMEOUT_SECONDS * rounds * 1.5
+
+        # Tags are submitted from their own small pool as each function is
+        # created, so they overlap with the remaining creations
+        executor = ThreadPoolExecutor(max_workers=num_workers)
+        tag_executor = ThreadPoolExecutor(max_workers=TAG_WORKERS)
+        self._creation_abandoned.clear()
+        try:
             futures = {
-                executor.submit(self._create_function_with_retry, candidate, 2): candidate
-                for candidate in unique_candidates
+                executor.submit(self._create_function_with_retry, candidate, 2, func_name): func_name
+                for func_name, candidate in unique_candidates
             }
             
             logger.info(f"Thread pool started: {len(futures)} tasks submitted with {num_workers} max worker threads")
 
-            for future in as_completed(futures):
-                try:
-                    result = future.result()
-                    results.append(result)
-                except Exception as e:
-                    candidate = futures[future]
-                    func_name = self._sanitize_function_name(candidate.question)
-                    logger.error(f"Unexpected error creating function {func_name}: {e}")
+            pending = set(futures)
+            try:
+                for future in as_completed(futures, timeout=timeout_seconds):
+                    pending.discard(future)
+                    try:
+                        result = future.result()
+                        results.append(result)
+                        if result.success:
+                            tag_executor.submit(
+                                self._set_function_tags,
+                                f"{self.catalog}.{self.schema}.{result.name}",
+                            )
+                    except Exception as e:
+                        func_name = futures[future]
+                        logger.error(f"Unexpected error creating function {func_name}: {e}")
+                        results.append(
+                            CreationResult(
+                                success=False,
+                                asset_type="uc_function",
+                                name=func_name,
+                                error=f"Unexpected error: {e}",
+                            )
+                        )
+            except FuturesTimeoutError:
+                # Stop workers from starting new attempts, and cancel the statements
+                # they are waiting on so a hung CREATE cannot succeed unreported
+                self._creation_abandoned.set()
+                with self._running_statements_lock:
+                    running_statements = dict(self._running_statements)
+                for statement_id in running_statements.values():
+                    self._cancel_statement(statement_id)
+
+                not_started = 0
+                for future in pending:
+                    func_name = futures[future]
+                    if future.cancel():
+                        not_started += 1
+                        error = f"Not started: creation timed out after {timeout_seconds:.0f}s"
+                    elif func_name in running_statements:
+                        error = (
+                            f"Still running after {timeout_seconds:.0f}s, statement cancelled; "
+                            "outcome unknown"
+                        )
+                    else:
+                        error = f"Still running after {timeout_seconds:.0f}s; outcome unknown"
                     results.append(
                         CreationResult(
                             success=False,
                             asset_type="uc_function",
                             name=func_name,
-                            error=f"Unexpected error: {e}",
+                            error=error,
                         )
                     )
+                logger.error(
+                    f"UC function creation did not finish within {timeout_seconds:.0f}s: "
+                    f"{len(pending) - not_started} functions still running with unknown "
+                    f"outcome, {not_started} not started"
+                )
+        finally:
+            # Don't block on statements that are still hung
+            executor.shutdown(wait=False, cancel_futures=True)
+            # Tag submissions return as soon as the statement is accepted
+            tag_executor.shutdown(wait=True)
+
+        # Smoke test is informational only - doesn't affect success
+        created_names = [r.name for r in results if r.success]
+        if created_names and verify_creation:
+            logger.info(f"Running smoke test for {len(created_names)} UC functions")
+            for func_name, (test_passed, test_error) in self._test_functions(created_names).items():
+                if test_passed:
+                    logger.success(f"Smoke test passed for {func_name}")
+                else:
+                    logger.warning(f"Smoke test failed for {func_name}: {test_error}")
+                    logger.info(f"Function {func_name} was created but may need manual verification")
 
-        successful = sum(1 for r in results if r.success)
+        successful = len(created_names)
         logger.info(f"Created {successful}/{len(results)} UC functions")
 
         return results
 
+    def _all_registered(self, config: dict, function_names: list[str]) -> bool:
+        """
+        Check whether a space configuration registers every given function.
+
+        Args:
+            config: The parsed space configuration.
+            function_names: Full function names (catalog.schema.function_name).
+
+        Returns:
+            True if every function is listed in the space's sql_functions.
+        """
+        registered = {
+            func.get("identifier", "")
+            for func in config.get("instructions", {}).get("sql_functions", [])
+        }
+        return registered.issuperset(function_names)
+
+    def _already_registered_results(self, function_names: list[str]) -> list[CreationResult]:
+        """
+        Build the skip results for functions that are all registered already.
+
+        Args:
+            function_names: Full function names (catalog.schema.function_name).
+
+        Returns:
+            One unsuccessful CreationResult per function.
+        """
+        logger.info(f"All {len(function_names)} functions already registered in space")
+        return [
+            CreationResult(
+                success=False,
+                asset_type="function_registration",
+                name=func_name,
+                error="Function already registered (use --force to replace)",
+            )
+            for func_name in function_names
+        ]
+
     def register_functions_with_genie(
         self,
         function_names: list[str],
@@ -1076,6 +1754,13 @@ RETURN ({candidate.sql})"""
 
         results: list[CreationResult] = []
 
+        # Without force, a run where every function is already registered
+        # changes nothing; a recent copy of the space can tell without a GET
+        if not force:
+            cached_config = self._cached_space_config()
+            if cached_config is not None and self._all_registered(cached_config, function_names):
+                return self._already_registered_results(function_names)
+
         try:
             # Get current space configuration
             config = self._get_current_space_config()
@@ -1088,6 +1773,10 @@ RETURN ({candidate.sql})"""
 
             existing_functions = config["instructions"]["sql_functions"]
 
+            # Skip building the index and the update when nothing would change
+            if not force and self._all_registered(config, function_names):
+                return self._already_registered_results(function_names)
+
             # Build map of existing function identifiers
             existing_identifiers = {
                 func.get("identifier", ""): i for i, func in enumerate(existing_functions)
@@ -1098,7 +1787,7 @@ RETURN ({candidate.sql})"""
                     f"Found {len(existing_identifiers)} existing registered functions in space"
                 )
 
-            new_functions: list[dict] = []
+            names_to_register: list[str] = []
             indices_to_remove: list[int] = []
 
             for func_name in function_names:
@@ -1121,13 +1810,7 @@ RETURN ({candidate.sql})"""
                         )
                         continue
 
-                # Create new registration entry
-                sql_func = SqlFunction(
-                    id=self._generate_unique_id(),
-                    identifier=func_name,
-                )
-
-                new_functions.append(sql_func.model_dump())
+                names_to_register.append(func_name)
 
                 logger.info(f"Registering function with Genie: {func_name}")
                 results.append(
@@ -1138,10 +1821,18 @@ RETURN ({candidate.sql})"""
                     )
                 )
 
-            if not new_functions:
+            if not names_to_register:
                 logger.info("No new functions to register")
                 return results
 
+            # Create new registration entries
+            new_functions = [
+                SqlFunction.model_construct(id=func_id, identifier=func_name).model_dump()
+                for func_id, func_name in zip(
+                    self._generate_unique_ids(len(names_to_register)), names_to_register
+                )
+            ]
+
             if dry_run:
                 logger.info(f"[DRY RUN] Would register {len(new_functions)} functions")
                 if indices_to_remove:
@@ -1165,16 +1856,14 @@ RETURN ({candidate.sql})"""
             config["instructions"]["sql_functions"].sort(key=lambda x: x.get("id", ""))
 
             # Update the space
-            serialized = json.dumps(config)
-            self.client.genie.update_space(
-                space_id=self.space_id,
-                serialized_space=serialized,
-            )
+            self._update_space_config(config)
 
             logger.success(f"Registered {len(new_functions)} functions with Genie room")
 
         except Exception as e:
             logger.error(f"Failed to register functions: {e}")
+            # The space may have changed underneath us, don't answer checks from the cache
+            self._space_config_cache = None
             results.append(
                 CreationResult(
                     success=False,
@@ -1224,8 +1913,14 @@ RETURN ({candidate.sql})"""
 
         # Create UC functions
         if create_uc_functions:
+            # Genie can only register functions once UC lists them, so verify
+            # creation when registration follows
             uc_results = self.create_uc_functions(
-                candidates, dry_run=dry_run, force=force, num_workers=num_workers
+                candidates,
+                dry_run=dry_run,
+                force=force,
+                num_workers=num_workers,
+                verify_creation=register_uc_functions,
             )
         else:
             logger.info("Skipping UC function creation (--no-uc-functions)")
@@ -1241,11 +1936,8 @@ RETURN ({candidate.sql})"""
                 if r.success
             ]
             if created_functions:
-                # Wait for Unity Catalog metadata to fully propagate before batch registration
-                # This ensures Genie can successfully retrieve schemas for all functions
-                logger.info(f"Waiting for UC metadata propagation for {len(created_functions)} functions before Genie registration")
-                time.sleep(3)
-                
+                # No fixed wait for UC metadata propagation here: the smoke test in
+                # create_uc_functions() already waited until the functions were listed
                 register_results = self.register_functions_with_genie(
                     created_functions, dry_run=dry_run, force=force
                 )